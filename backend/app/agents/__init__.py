@@ -0,0 +1,6 @@
+"""
+LLM agents. Each is async (arun, or adecide/aevaluate for the router and
+judge); the matching run()/decide()/evaluate() methods are blocking
+asyncio.run() wrappers for callers outside an event loop. Agents hold no
+per-request state, so each node builds its agent once (functools.cache).
+"""
@@ -1,18 +1,15 @@
-from langchain_community.llms import Ollama
+import asyncio
+from typing import Iterator
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke, cached_stream
+from ..core.serialize import compact
 
 class AnalyzerAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_ANALYZER,
-            temperature=settings.TEMPERATURE_ANALYZER
-        )
-        
-        self.template = """
+    template = """
         SYSTEM:
         You are a Senior Media Planner with strong experience reviewing briefs for strategic readiness and execution risk.
 
@@ -41,18 +38,35 @@ class AnalyzerAgent:
 
         STRATEGIC ANALYSIS:
         """
-        
-        self.prompt = PromptTemplate(
-            input_variables=["content"],
-            template=self.template
-        )
+
+    prompt = PromptTemplate(
+        input_variables=["content"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_ANALYZER, settings.TEMPERATURE_ANALYZER, num_keep=self.num_keep)
+
+    def render(self, content: str) -> str:
+        """Prompt for one call; arun() and run_stream() both send exactly this."""
+        return self.prompt.format(content=compact(content))
 
     @trace_agent_execution("analysis", settings.OLLAMA_MODEL_ANALYZER)
-    def run(self, content: str):
+    async def arun(self, content: str):
         try:
             logger.info("Agent: Analyzer performing strategic review...")
-            chain = self.prompt | self.llm
-            return chain.invoke({"content": str(content)})
+            prompt = self.render(content)
+            return await cached_ainvoke(self.llm, prompt, "analysis", compact(content))
         except Exception as e:
             logger.error(f"Analyzer Error: {e}")
-            return "Strategic analysis failed."
\ No newline at end of file
+            return "Strategic analysis failed."
+
+    def run(self, content: str):
+        return asyncio.run(self.arun(content))
+
+    def run_stream(self, content: str) -> Iterator[str]:
+        """Yield the completion as it is generated (for streaming responses)."""
+        prompt = self.render(content)
+        return cached_stream(self.llm, prompt)
@@ -1,9 +1,29 @@
-from typing import Dict, List, TypedDict
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, TypedDict
 import re
+import threading
 from dataclasses import dataclass
 from enum import Enum
+from functools import lru_cache
 from ..core.logging import logger
 
+# Optional dependencies handled gracefully
+try:
+    import hyperscan
+except ImportError:
+    hyperscan = None
+
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+try:
+    import numpy as np
+    from numba import njit
+except ImportError:
+    np = None
+    njit = None
+
 
 class Severity(str, Enum):
     BLOCK = "block"
@@ -13,9 +33,26 @@ class Severity(str, Enum):
 
 @dataclass(frozen=True)
 class ComplianceRule:
-    pattern: str
+    regex: re.Pattern
     severity: Severity
     description: str
+    # Plain keyword alternatives, set when the rule has no regex syntax
+    # beyond word boundaries (lets it run on the Aho-Corasick path).
+    keywords: Tuple[str, ...] = ()
+    # Characters any match must start with (lowercase), used to skip the
+    # scan entirely for content that cannot match.
+    lead_chars: str = ""
+
+    @classmethod
+    def from_keywords(cls, keywords: Tuple[str, ...], severity: Severity, description: str) -> "ComplianceRule":
+        alternation = "|".join(re.escape(keyword) for keyword in keywords)
+        return cls(
+            regex=re.compile(rf"\b(?:{alternation})\b", re.IGNORECASE),
+            severity=severity,
+            description=description,
+            keywords=keywords,
+            lead_chars="".join(sorted({keyword[0].lower() for keyword in keywords}))
+        )
 
 
 class Issue(TypedDict):
@@ -24,84 +61,292 @@ class Issue(TypedDict):
     description: str
 
 
+# Risk weights indexed by severity code (block, privacy, review)
+_SEVERITY_CODES: Dict[str, int] = {
+    Severity.BLOCK.value: 0,
+    Severity.PRIVACY.value: 1,
+    Severity.REVIEW.value: 2,
+}
+_SEVERITY_NAMES: Tuple[str, ...] = tuple(_SEVERITY_CODES)
+_RISK_WEIGHTS: Tuple[int, ...] = (5, 3, 1)
+
+if njit is not None:
+    _WEIGHTS = np.array(_RISK_WEIGHTS, dtype=np.int32)
+
+    @njit(cache=True)
+    def _risk(codes, weights):
+        total = 0
+        for code in codes:
+            total += weights[code]
+        return total
+
+    # Compile at import so the first request doesn't pay for the JIT
+    _risk(np.empty(0, dtype=np.int8), _WEIGHTS)
+else:
+    _risk = None
+
+
+class Findings:
+    """
+    Compliance hits stored column-wise: parallel lists of severity codes and
+    matched text instead of one dict per hit. Dicts are only built by
+    to_dicts(), at the report boundary.
+    """
+
+    __slots__ = ("severities", "matches", "_descriptions")
+
+    def __init__(self, descriptions: Sequence[str]):
+        self.severities: List[int] = []
+        self.matches: List[str] = []
+        self._descriptions = descriptions
+
+    def append(self, severity: int, match: str) -> None:
+        self.severities.append(severity)
+        self.matches.append(match)
+
+    def __len__(self) -> int:
+        return len(self.severities)
+
+    def to_dicts(self) -> List[Issue]:
+        return [
+            {
+                "severity": _SEVERITY_NAMES[code],
+                "match": match,
+                "description": self._descriptions[code]
+            }
+            for code, match in zip(self.severities, self.matches)
+        ]
+
+
+def _compile_hyperscan(rules: Sequence[ComplianceRule]) -> Optional["hyperscan.Database"]:
+    """Compile all rules into one Hyperscan multi-pattern database (None if unavailable)."""
+    if hyperscan is None:
+        return None
+
+    try:
+        db = hyperscan.Database()
+        db.compile(
+            expressions=[rule.regex.pattern.encode() for rule in rules],
+            ids=list(range(len(rules))),
+            elements=len(rules),
+            flags=[hyperscan.HS_FLAG_CASELESS | hyperscan.HS_FLAG_SOM_LEFTMOST] * len(rules),
+        )
+        return db
+    except Exception as e:
+        logger.warning(f"Compliance: Hyperscan compile failed, using re fallback: {e}")
+        return None
+
+
+def _build_automaton(rules: Sequence[ComplianceRule]) -> Optional["ahocorasick.Automaton"]:
+    """Build one Aho-Corasick automaton over the keywords of literal rules (None if unavailable)."""
+    if ahocorasick is None or not any(rule.keywords for rule in rules):
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for index, rule in enumerate(rules):
+        for keyword in rule.keywords:
+            automaton.add_word(keyword.lower(), (len(keyword), index))
+    automaton.make_automaton()
+    return automaton
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _literal_spans(automaton: "ahocorasick.Automaton", text: str) -> List[Tuple[int, int, int]]:
+    """(start, rule_index, end) keyword hits that sit on word boundaries, like \\b in the regexes."""
+    spans = []
+    size = len(text)
+    for last, (length, index) in automaton.iter(text):
+        start, end = last - length + 1, last + 1
+        if start > 0 and _is_word_char(text[start - 1]):
+            continue
+        if end < size and _is_word_char(text[end]):
+            continue
+        spans.append((start, index, end))
+    return spans
+
+
+def _leftmost(spans: List[Tuple[int, int, int]]) -> Iterator[Tuple[int, int, int]]:
+    """Reduce overlapping hits to re's leftmost, non-overlapping semantics (rule order breaks ties)."""
+    last_end = 0
+    for start, index, end in sorted(spans):
+        if start < last_end:
+            continue
+        last_end = end
+        yield start, index, end
+
+
 class ComplianceAgent:
     """
     Deterministic compliance agent for marketing content.
     Safe for CI and production pipelines (no LLM usage).
     """
 
+    # Patterns are compiled once at import; run() only pays for the scan.
     RULES: List[ComplianceRule] = [
         # BLOCK
-        ComplianceRule(
-            pattern=r"\b(spam|cookie stuffing|harvest|sell data|sell personal)\b",
+        ComplianceRule.from_keywords(
+            keywords=("spam", "cookie stuffing", "harvest", "sell data", "sell personal"),
             severity=Severity.BLOCK,
             description="Illegal or unethical marketing behavior"
         ),
 
         # PRIVACY
-        ComplianceRule(
-            pattern=r"\b(ssn|social security|credit card|dob|date of birth|personal data)\b",
+        ComplianceRule.from_keywords(
+            keywords=("ssn", "social security", "credit card", "dob", "date of birth", "personal data"),
             severity=Severity.PRIVACY,
             description="Sensitive personal data detected"
         ),
 
         # REVIEW
         ComplianceRule(
-            pattern=r"\b(guarantee|risk[- ]?free|best ever|unlimited)\b",
+            regex=re.compile(r"\b(?:guarantee|risk[- ]?free|best ever|unlimited)\b", re.IGNORECASE),
             severity=Severity.REVIEW,
-            description="Potential misleading marketing claim"
+            description="Potential misleading marketing claim",
+            lead_chars="bgru"
         ),
     ]
 
+    # Both cases, since the check runs on the raw content before normalizing
+    _LEAD_CHARS = frozenset(
+        "".join(rule.lead_chars for rule in RULES) + "".join(rule.lead_chars for rule in RULES).upper()
+    )
+
+    # A single BLOCK hit decides the status, so it is checked first with a
+    # cheap search() and the full enumeration only runs for the rest.
+    _BLOCK_RULE = next(rule for rule in RULES if rule.severity is Severity.BLOCK)
+    _SCAN_RULES: List[ComplianceRule] = [rule for rule in RULES if rule.severity is not Severity.BLOCK]
+
+    # Remaining rules fused into one alternation so the content is scanned
+    # once; the named group that matched (m.lastgroup) carries the severity.
+    _COMBINED = re.compile(
+        "|".join(f"(?P<{rule.severity.value}>{rule.regex.pattern})" for rule in _SCAN_RULES),
+        re.IGNORECASE
+    )
+    _SCAN_CODES: List[int] = [_SEVERITY_CODES[rule.severity.value] for rule in _SCAN_RULES]
+
+    # Description per severity code (one rule per severity), for Findings.to_dicts()
+    _DESCRIPTIONS: Tuple[str, ...] = tuple(
+        rule.description for rule in sorted(RULES, key=lambda rule: _SEVERITY_CODES[rule.severity.value])
+    )
+
+    # Literal keyword sets run on Aho-Corasick automatons when pyahocorasick
+    # is installed; rules with real regex syntax (REVIEW) stay on re.
+    _BLOCK_AUTOMATON = _build_automaton([_BLOCK_RULE])
+    _SCAN_AUTOMATON = _build_automaton(_SCAN_RULES)
+
+    # Otherwise, SIMD multi-pattern scan when python-hyperscan is installed.
+    # Hyperscan scratch space is not re-entrant, so scans are serialized.
+    _HS_DB = _compile_hyperscan(_SCAN_RULES)
+    _HS_LOCK = threading.Lock()
+
     def run(self, content: str) -> Dict[str, object]:
         logger.info("Agent: Compliance checking content")
 
+        # Fast path: no character any rule can start with (typical for clean
+        # or non-Latin briefs), so no rule can match
+        findings = Findings(self._DESCRIPTIONS)
+        if self._LEAD_CHARS.isdisjoint(content):
+            return self._report(findings)
+
         normalized = self._normalize(content)
-        issues: List[Issue] = []
 
-        for rule in self.RULES:
-            matches = re.findall(rule.pattern, normalized, flags=re.IGNORECASE)
+        # Matching is case-insensitive, so only the automaton path needs a
+        # lowercase copy; the regex and Hyperscan paths scan text as-is.
+        folded = None
+        if self._BLOCK_AUTOMATON is not None or self._SCAN_AUTOMATON is not None:
+            folded = self._fold(normalized)
 
-            for match in matches:
-                issues.append({
-                    "severity": rule.severity.value,
-                    "match": match,
-                    "description": rule.description
-                })
+        blocked = self._find_block(normalized, folded)
+        if blocked:
+            findings.append(_SEVERITY_CODES[Severity.BLOCK.value], blocked)
+            return self._report(findings)
 
-        status = self._resolve_status(issues)
+        for severity, match in self._scan(normalized, folded):
+            findings.append(severity, match)
 
+        return self._report(findings)
+
+    def _report(self, findings: Findings) -> Dict[str, object]:
         return {
-            "status": status,
-            "issues": issues,
-            "issue_count": len(issues),
-            "risk_score": self._calculate_risk(issues)
+            "status": self._resolve_status(findings.severities),
+            "issues": findings.to_dicts(),
+            "issue_count": len(findings),
+            "risk_score": self._calculate_risk(findings.severities)
         }
 
-    def _normalize(self, text: str) -> str:
-        """Basic text normalization pipeline."""
-        text = text.lower()
-        text = re.sub(r"\s+", " ", text)
-        return text.strip()
+    def _find_block(self, text: str, folded: Optional[str]) -> Optional[str]:
+        """Return the leftmost BLOCK match (lowercased), if any."""
+        if self._BLOCK_AUTOMATON is None or folded is None:
+            m = self._BLOCK_RULE.regex.search(text)
+            return m.group().lower() if m else None
+
+        spans = _literal_spans(self._BLOCK_AUTOMATON, folded)
+        if not spans:
+            return None
+        start, _, end = min(spans)
+        return folded[start:end]
+
+    def _scan(self, text: str, folded: Optional[str]) -> Iterator[Tuple[int, str]]:
+        """Yield (severity code, lowercased match) pairs in document order."""
+        if self._SCAN_AUTOMATON is not None and folded is not None:
+            spans = _literal_spans(self._SCAN_AUTOMATON, folded)
+            for index, rule in enumerate(self._SCAN_RULES):
+                if not rule.keywords:
+                    spans.extend((m.start(), index, m.end()) for m in rule.regex.finditer(folded))
+            for start, index, end in _leftmost(spans):
+                yield self._SCAN_CODES[index], folded[start:end]
+            return
+
+        if self._HS_DB is None:
+            for m in self._COMBINED.finditer(text):
+                yield _SEVERITY_CODES[m.lastgroup], m.group().lower()
+            return
+
+        data = text.encode()
+        hits: List[Tuple[int, int, int]] = []
+
+        def on_match(rule_id, start, end, flags, context):
+            hits.append((start, rule_id, end))
 
-    def _resolve_status(self, issues: List[Issue]) -> str:
-        if any(i["severity"] == Severity.BLOCK for i in issues):
+        with self._HS_LOCK:
+            self._HS_DB.scan(data, match_event_handler=on_match)
+
+        # Hyperscan reports every match; keep re's semantics so backends agree.
+        for start, rule_id, end in _leftmost(hits):
+            yield self._SCAN_CODES[rule_id], data[start:end].decode().lower()
+
+    @staticmethod
+    @lru_cache(maxsize=128)
+    def _normalize(text: str) -> str:
+        """Basic text normalization pipeline (memoized for repeated inputs)."""
+        return re.sub(r"\s+", " ", text).strip()
+
+    @staticmethod
+    def _fold(text: str) -> Optional[str]:
+        """Lowercase copy for the automatons, or None if lowercasing would shift offsets."""
+        folded = text.lower()
+        return folded if len(folded) == len(text) else None
+
+    def _resolve_status(self, severities: List[int]) -> str:
+        present = set(severities)
+
+        if _SEVERITY_CODES[Severity.BLOCK.value] in present:
             return Severity.BLOCK.value
 
-        if any(i["severity"] == Severity.PRIVACY for i in issues):
+        if _SEVERITY_CODES[Severity.PRIVACY.value] in present:
             return Severity.REVIEW.value
 
-        if issues:
+        if present:
             return Severity.REVIEW.value
 
         return "ok"
 
-    def _calculate_risk(self, issues: List[Issue]) -> int:
+    def _calculate_risk(self, severities: List[int]) -> int:
         """Simple weighted risk scoring for analytics."""
-        weights = {
-            Severity.BLOCK.value: 5,
-            Severity.PRIVACY.value: 3,
-            Severity.REVIEW.value: 1,
-        }
+        if _risk is None:
+            return sum(_RISK_WEIGHTS[code] for code in severities)
 
-        return sum(weights[i["severity"]] for i in issues)
+        return int(_risk(np.array(severities, dtype=np.int8), _WEIGHTS))
@@ -1,18 +1,14 @@
-from langchain_community.llms import Ollama
+import asyncio
+from typing import Iterator
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke, cached_stream
 
 class CopywriterAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_COPYWRITER,
-            temperature=settings.TEMPERATURE_COPYWRITER
-        )
-
-        self.template = """
+    template = """
         SYSTEM:
         You are a senior performance-focused marketing copywriter with experience in email and digital campaign optimization.
 
@@ -61,19 +57,34 @@ class CopywriterAgent:
         COPY VARIANTS:
         """
 
-        self.prompt = PromptTemplate(
-            input_variables=["brief", "user_request"],
-            template=self.template
-        )
+    prompt = PromptTemplate(
+        input_variables=["brief", "user_request"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_COPYWRITER, settings.TEMPERATURE_COPYWRITER, num_keep=self.num_keep)
+
+    def render(self, brief: str, user_request: str) -> str:
+        """Prompt for one call; arun() and run_stream() both send exactly this."""
+        return self.prompt.format(brief=brief, user_request=user_request)
 
-    
     @trace_agent_execution("copywriter", settings.OLLAMA_MODEL_COPYWRITER)
-    def run(self, brief: str, user_request: str):
+    async def arun(self, brief: str, user_request: str):
         try:
             logger.info("Agent: Copywriter creating variants...")
-            chain = self.prompt | self.llm
-            result = chain.invoke({"brief": brief, "user_request": user_request})
-            return result
+            prompt = self.render(brief, user_request)
+            return await cached_ainvoke(self.llm, prompt, "copywriting", f"{user_request}\n{brief}")
         except Exception as e:
             logger.error(f"Copywriter Error: {e}")
-            return "Copy generation failed."
\ No newline at end of file
+            return "Copy generation failed."
+
+    def run(self, brief: str, user_request: str):
+        return asyncio.run(self.arun(brief, user_request))
+
+    def run_stream(self, brief: str, user_request: str) -> Iterator[str]:
+        """Yield the completion as it is generated (for streaming responses)."""
+        prompt = self.render(brief, user_request)
+        return cached_stream(self.llm, prompt)
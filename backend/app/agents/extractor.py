@@ -1,23 +1,19 @@
-from langchain_community.llms import Ollama
+import asyncio
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke
 
 class ExtractorAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_EXTRACTOR,
-            temperature=settings.TEMPERATURE_EXTRACTOR 
-        )
-        
-        # Define the Expected Output Structure
-        self.parser = JsonOutputParser()
-        
-        # Build a Robust Prompt (The "System Instructions")
-        template = """
+    # JSON mode guarantees syntactically valid output, so the parser is
+    # only a cheap json.loads and needs no format instructions in the prompt
+    parser = JsonOutputParser()
+
+    # Build a Robust Prompt (The "System Instructions")
+    template = """
         SYSTEM:
         You are a specialized Media Analysis AI. Your task is to extract structured information 
         from raw text briefs provided by advertising agencies.
@@ -45,27 +41,31 @@ class ExtractorAgent:
         
         USER TEXT TO ANALYZE:
         {text}
-
-        {format_instructions}
         """
 
-        self.prompt = PromptTemplate(
-            template=template,
-            input_variables=["text"],
-            partial_variables={"format_instructions": self.parser.get_format_instructions()},
-        )
+    prompt = PromptTemplate(
+        template=template,
+        input_variables=["text"],
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_EXTRACTOR, settings.TEMPERATURE_EXTRACTOR, format="json", num_keep=self.num_keep)
+
+    def render(self, text: str) -> str:
+        """Prompt for one call, rendered directly rather than through a Runnable chain."""
+        return self.prompt.format(text=text)
 
     @trace_agent_execution("extraction", settings.OLLAMA_MODEL_EXTRACTOR)
-    def run(self, text: str):
+    async def arun(self, text: str):
         """
         The execution logic.
         """
         try:
             logger.info("Agent: Extractor starting work...")
             
-            chain = self.prompt | self.llm | self.parser
-            
-            response = chain.invoke({"text": text})
+            response = self.parser.parse(await cached_ainvoke(self.llm, self.render(text)))
             logger.info("Agent: Extraction completed successfully.")
             return response
             
@@ -77,4 +77,7 @@ class ExtractorAgent:
                 "summary": "Extraction failed",
                 "key_points": [],
                 "error_details": str(e)
-            }
\ No newline at end of file
+            }
+
+    def run(self, text: str):
+        return asyncio.run(self.arun(text))
\ No newline at end of file
@@ -0,0 +1,69 @@
+import asyncio
+from typing import Dict
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import JsonOutputParser
+from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
+from ..core.logging import logger
+from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke
+from ..core.serialize import compact
+
+class SummarizeTranslateAgent:
+    """
+    Summarizer and Translator fused into one call: the translation's input is
+    the summary, so writing both in one JSON answer saves a full round-trip
+    and the prefill of a second prompt.
+    """
+    parser = JsonOutputParser()
+
+    template = """
+        SYSTEM:
+        You are a senior Media Strategist and professional Arabic Translator turning marketing briefs into executive-ready insights.
+
+        TASK:
+        1. Summarize the extracted brief into a sharp executive summary a busy Creative Director can grasp in 30 seconds.
+        Be concise and strategic, with no fluff or generic marketing language.
+        Use only the extracted data; state missing information as a constraint.
+        2. Translate that summary into Modern Standard Arabic, keeping common industry terms like "CTR" and "Brief" in English.
+
+        SUMMARY FORMAT (STRICT):
+        1. **Big Idea**: one sentence capturing the core strategic idea.
+        2. **Execution**:
+        - Primary creative direction
+        - Key channel(s) and content approach
+        - Core CTA or performance driver
+        3. **Critical Deadline / Constraint**: one sentence on the key timing, budget, or limitation.
+
+        OUTPUT:
+        Strictly valid JSON with exactly two string fields: "summary" (English) and "translation" (Arabic).
+
+        EXTRACTED DATA:
+        {extraction_data}
+        """
+
+    prompt = PromptTemplate(
+        input_variables=["extraction_data"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_SUMMARIZER, settings.TEMPERATURE_SUMMARIZER, format="json", num_keep=self.num_keep, num_predict=settings.NUM_PREDICT_SUMMARIZE_TRANSLATE)
+
+    @trace_agent_execution("summary_translation", settings.OLLAMA_MODEL_SUMMARIZER)
+    async def arun(self, extraction_data: dict) -> Dict[str, str]:
+        """
+        Returns {"summary": ..., "translation": ...}. Unlike the single agents
+        this raises on failure, so the caller can fall back to running them.
+        """
+        logger.info("Agent: Summarizer+Translator condensing and translating data...")
+        content_str = compact(extraction_data)
+        response = self.parser.parse(await cached_ainvoke(self.llm, self.prompt.format(extraction_data=content_str)))
+        if not isinstance(response, dict) or not response.get("summary") or not response.get("translation"):
+            raise ValueError("Fused answer is missing the summary or the translation")
+        return {"summary": str(response["summary"]), "translation": str(response["translation"])}
+
+    def run(self, extraction_data: dict) -> Dict[str, str]:
+        return asyncio.run(self.arun(extraction_data))
@@ -1,18 +1,14 @@
-from langchain_community.llms import Ollama
+import asyncio
+from typing import Iterator
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke, cached_stream
 
 class IdeationAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_IDEATION,
-            temperature=settings.TEMPERATURE_IDEATION
-        )
-
-        self.template = """
+    template = """
         SYSTEM:
         You are a senior creative marketing strategist and copy lead known for generating campaign ideas that are both original and executable.
 
@@ -58,17 +54,34 @@ class IdeationAgent:
         CAMPAIGN IDEAS:
         """
 
-        self.prompt = PromptTemplate(
-            input_variables=["content"],
-            template=self.template
-        )
+    prompt = PromptTemplate(
+        input_variables=["content"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_IDEATION, settings.TEMPERATURE_IDEATION, num_keep=self.num_keep)
+
+    def render(self, content: str) -> str:
+        """Prompt for one call; arun() and run_stream() both send exactly this."""
+        return self.prompt.format(content=content)
 
     @trace_agent_execution("ideation", settings.OLLAMA_MODEL_IDEATION)
-    def run(self, content: str):
+    async def arun(self, content: str):
         try:
             logger.info("Agent: Ideation generating campaign ideas...")
-            chain = self.prompt | self.llm
-            return chain.invoke({"content": content})
+            prompt = self.render(content)
+            return await cached_ainvoke(self.llm, prompt, "ideation", content)
         except Exception as e:
             logger.error(f"Ideation Error: {e}")
-            return "Ideation failed."
\ No newline at end of file
+            return "Ideation failed."
+
+    def run(self, content: str):
+        return asyncio.run(self.arun(content))
+
+    def run_stream(self, content: str) -> Iterator[str]:
+        """Yield the completion as it is generated (for streaming responses)."""
+        prompt = self.render(content)
+        return cached_stream(self.llm, prompt)
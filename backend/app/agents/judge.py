@@ -1,18 +1,29 @@
-from langchain_community.llms import Ollama
+import asyncio
+import re
+from contextlib import aclosing
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import alookup, astore, cached_acall, cached_ainvoke
+from ..core.serialize import compact
 
 class JudgeAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_JUDGE,
-            temperature=settings.TEMPERATURE_JUDGE
-        )
+    # Single judgement: the SCORE line and the first REASONING line, found
+    # independently so a score without reasoning still counts
+    _SCORE = re.compile(r"^SCORE:\s*(\d+)", re.MULTILINE)
+    _REASONING = re.compile(r"^REASONING:[ \t]*(.+)$", re.MULTILINE)
+
+    # Batched judgements answer with numbered SCORE_<n>/REASONING_<n> lines
+    _BATCH_SCORE = re.compile(r"SCORE_(\d+):\s*(\d+)")
+    _BATCH_REASONING = re.compile(r"REASONING_(\d+):[ \t]*(.*)")
 
-        self.template = """
+    # Static instructions first, variable fields last, so the rendered
+    # prompts share the longest possible byte-identical prefix.
+    template = """
         SYSTEM:
         You are an AI Quality Judge. Your task is to evaluate the quality of AI-generated content for a specific agent type.
         Provide a score from 1-10 (10 being perfect) and brief reasoning.
@@ -24,55 +35,92 @@ class JudgeAgent:
         - Clarity: Clear and understandable
         - Quality: Overall professional quality
 
+        Provide your evaluation in this format:
+        SCORE: [1-10]
+        REASONING: [brief explanation]
+
         AGENT TYPE: {agent_type}
         INPUT CONTEXT: {input_context}
         OUTPUT TO EVALUATE: {output}
 
-        Provide your evaluation in this format:
-        SCORE: [1-10]
-        REASONING: [brief explanation]
+        EVALUATION:
         """
 
-        self.prompt = PromptTemplate(
-            input_variables=["agent_type", "input_context", "output"],
-            template=self.template
-        )
+    prompt = PromptTemplate(
+        input_variables=["agent_type", "input_context", "output"],
+        template=template
+    )
 
-    @trace_agent_execution("judgement", settings.OLLAMA_MODEL_JUDGE)
-    def evaluate(self, agent_type: str, input_context: str, output: str) -> dict:
+    num_keep = prefix_tokens(template)
+
+    batch_template = """
+        SYSTEM:
+        You are an AI Quality Judge. Your task is to evaluate the quality of several AI-generated outputs, each for a specific agent type.
+        Judge every item independently. Provide a score from 1-10 (10 being perfect) and brief reasoning for each.
+
+        EVALUATION CRITERIA:
+        - Relevance: How well it addresses the task
+        - Accuracy: Factual correctness and coherence
+        - Completeness: Coverage of required elements
+        - Clarity: Clear and understandable
+        - Quality: Overall professional quality
+
+        Provide your evaluation for every item in this format, where N is the item number:
+        SCORE_N: [1-10]
+        REASONING_N: [brief explanation]
+
+        {items}
+
+        EVALUATIONS:
+        """
+
+    batch_prompt = PromptTemplate(
+        input_variables=["items"],
+        template=batch_template
+    )
+
+    def __init__(self, defer: bool = False):
+        # Deferred judges hand back the item unscored so the caller can
+        # score several outputs together with aevaluate_batch().
+        self.defer = defer
+        self.llm = get_ollama(settings.OLLAMA_MODEL_JUDGE, settings.TEMPERATURE_JUDGE, num_keep=self.num_keep)
+
+    @staticmethod
+    def pending(agent_type: str, input_context: str, output: str) -> Dict[str, object]:
+        """Unscored evaluation item, to be resolved by aevaluate_batch()."""
+        return {
+            "agent_type": agent_type,
+            "input_context": input_context,
+            "output": output,
+            "pending": True
+        }
+
+    async def aevaluate(self, agent_type: str, input_context: str, output: str) -> dict:
         """
         Evaluate the output quality.
-        Returns dict with score and reasoning.
+        Returns dict with score and reasoning (or a pending item when deferred).
         """
-        try:
-            logger.info(f"Judge: Evaluating {agent_type} output...")
+        if self.defer:
+            return self.pending(agent_type, input_context, output)
+        return await self._aevaluate(agent_type, input_context, output)
 
-            chain = self.prompt | self.llm
+    @trace_agent_execution("judgement", settings.OLLAMA_MODEL_JUDGE)
+    async def _aevaluate(self, agent_type: str, input_context: str, output: str) -> dict:
+        try:
+            logger.info("Judge: Evaluating %s output...", agent_type)
 
-            response = chain.invoke({
-                "agent_type": agent_type,
-                "input_context": input_context,
-                "output": str(output)
-            })
+            prompt = self._render(agent_type, input_context, output)
+            response = await cached_acall(
+                self.llm, prompt, self._astream_until_scored,
+                "judgement", f"{agent_type}\n{input_context}\n{compact(output)}"
+            )
 
             # Parse the response
-            response_text = response.strip()
-            lines = response_text.split('\n')
-
-            score = 5  # default
-            reasoning = "Evaluation failed to parse"
-
-            for line in lines:
-                if line.startswith('SCORE:'):
-                    try:
-                        score = int(line.split(':', 1)[1].strip())
-                        score = max(1, min(10, score))  # clamp to 1-10
-                    except:
-                        pass
-                elif line.startswith('REASONING:'):
-                    reasoning = line.split(':', 1)[1].strip()
-
-            logger.info(f"Judge: {agent_type} scored {score}/10")
+            score, reasoning = self._parse(response)
+            if score is None:
+                score = 5  # default
+
+            logger.info("Judge: %s scored %d/10", agent_type, score)
             return {
                 "score": score,
                 "reasoning": reasoning,
@@ -85,4 +133,129 @@ class JudgeAgent:
                 "score": 1,
                 "reasoning": f"Evaluation error: {str(e)}",
                 "agent_type": agent_type
-            }
\ No newline at end of file
+            }
+
+    def evaluate(self, agent_type: str, input_context: str, output: str) -> dict:
+        return asyncio.run(self.aevaluate(agent_type, input_context, output))
+
+    async def aevaluate_batch(self, items: List[dict]) -> List[dict]:
+        """
+        Score several {agent_type, input_context, output} items with one LLM call.
+        Items judged before (e.g. the extraction of a document asked about
+        again) reuse that judgement; items the batched answer does not cover
+        are re-scored individually.
+        """
+        results = list(await asyncio.gather(*(self._recall(item) for item in items)))
+        todo = [i for i, result in enumerate(results) if result is None]
+        if len(todo) == 1:
+            item = items[todo[0]]
+            results[todo[0]] = await self._aevaluate(item["agent_type"], item["input_context"], item["output"])
+            return results
+        if not todo:
+            return results
+
+        try:
+            batch = await self._aevaluate_batch([items[i] for i in todo])
+        except Exception as e:
+            logger.error(f"Judge: Batch evaluation failed with error: {str(e)}")
+            batch = [None] * len(todo)
+
+        for i, result in zip(todo, batch):
+            results[i] = result
+            if result is not None:
+                await self._remember(items[i], result)
+
+        missing = [i for i in todo if results[i] is None]
+        if missing:
+            logger.warning(f"Judge: Batch answer incomplete, re-scoring {len(missing)} item(s) individually")
+            rescored = await asyncio.gather(*(
+                self._aevaluate(items[i]["agent_type"], items[i]["input_context"], items[i]["output"])
+                for i in missing
+            ))
+            for i, result in zip(missing, rescored):
+                results[i] = result
+        return results
+
+    def evaluate_batch(self, items: List[dict]) -> List[dict]:
+        return asyncio.run(self.aevaluate_batch(items))
+
+    @trace_agent_execution("judgement", settings.OLLAMA_MODEL_JUDGE)
+    async def _aevaluate_batch(self, items: List[dict]) -> List[dict]:
+        """One batched call; entries the response does not score are None."""
+        logger.info("Judge: Evaluating %d outputs in one batch...", len(items))
+
+        rendered = "\n\n".join(
+            f"ITEM {i}:\n"
+            f"AGENT TYPE: {item['agent_type']}\n"
+            f"INPUT CONTEXT: {item['input_context']}\n"
+            f"OUTPUT TO EVALUATE: {compact(item['output'])}"
+            for i, item in enumerate(items, start=1)
+        )
+        response = await cached_ainvoke(self.llm, self.batch_prompt.format(items=rendered))
+
+        scores = {int(n): int(value) for n, value in self._BATCH_SCORE.findall(response)}
+        reasonings = {int(n): text.strip() for n, text in self._BATCH_REASONING.findall(response)}
+
+        results: List[dict] = []
+        for i, item in enumerate(items, start=1):
+            if i not in scores:
+                results.append(None)
+                continue
+            score = max(1, min(10, scores[i]))  # clamp to 1-10
+            logger.info("Judge: %s scored %d/10", item["agent_type"], score)
+            results.append({
+                "score": score,
+                "reasoning": reasonings.get(i, "Evaluation failed to parse"),
+                "agent_type": item["agent_type"]
+            })
+        return results
+
+    def _parse(self, response: str) -> Tuple[Optional[int], str]:
+        """(score clamped to 1-10 or None, reasoning) from a single judgement."""
+        score = self._SCORE.search(response)
+        reasoning = self._REASONING.search(response)
+        return (
+            max(1, min(10, int(score.group(1)))) if score else None,
+            reasoning.group(1).strip() if reasoning else "Evaluation failed to parse"
+        )
+
+    def _render(self, agent_type: str, input_context: str, output: str) -> str:
+        return self.prompt.format(agent_type=agent_type, input_context=input_context, output=compact(output))
+
+    async def _recall(self, item: dict):
+        """Earlier judgement of the same item from the completion cache, or None."""
+        response = await alookup(self.llm, self._render(item["agent_type"], item["input_context"], item["output"]))
+        score, reasoning = self._parse(response or "")
+        if score is None:
+            return None
+        logger.info("Judge: %s scored %d/10 (cached)", item["agent_type"], score)
+        return {"score": score, "reasoning": reasoning, "agent_type": item["agent_type"]}
+
+    async def _remember(self, item: dict, result: dict) -> None:
+        """Cache a batched judgement under the item's single-judgement prompt."""
+        await astore(
+            self.llm,
+            self._render(item["agent_type"], item["input_context"], item["output"]),
+            f"SCORE: {result['score']}\nREASONING: {result['reasoning']}\n"
+        )
+
+    async def _astream_until_scored(self, prompt: str) -> str:
+        """
+        Stream the judgement and stop reading once the SCORE line and the
+        first REASONING line are complete; nothing after them is parsed.
+        Runs on the event loop (no worker thread), like every other LLM call.
+        """
+        text = ""
+        async with aclosing(self.llm.astream_text(prompt)) as stream:
+            async for chunk in stream:
+                text += chunk
+                reasoning_at = text.find("REASONING:")
+                if reasoning_at != -1 and "SCORE:" in text and "\n" in text[reasoning_at:]:
+                    break
+        return text
+
+
+@lru_cache(maxsize=2)
+def get_judge(defer: bool = False) -> JudgeAgent:
+    """Shared judge; the instances hold no per-request state."""
+    return JudgeAgent(defer=defer)
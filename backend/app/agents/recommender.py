@@ -1,46 +1,28 @@
-from langchain_community.llms import Ollama
+import asyncio
+from typing import Iterator
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke, cached_stream
+from ..core.serialize import compact
 
 
 class RecommenderAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_RECOMMENDER,
-            temperature=settings.TEMPERATURE_RECOMMENDER,
-        )
-
-        self.template = """
+    template = """
         SYSTEM:
         You are a Senior Media & Growth Strategist advising creative and marketing teams.
 
         TASK:
-        Based on the provided brief or extracted information and user request, generate clear, high-impact recommendations that can be executed immediately.
+        From the input and user request, give exactly 3 specific, immediately executable recommendations, highest impact first.
+        Use only facts from the input and state any assumption briefly.
+        If the user request names a language (e.g. Arabic), write the whole response in it.
 
-        OUTPUT RULES:
-        - Provide exactly 3 recommendations, ordered by priority (1 = highest impact).
-        - Each recommendation must include:
-        - Recommendation: one concise action
+        FORMAT (STRICT), for N = 1..3:
+        N. Recommendation: one concise action
         - Rationale: one short reason tied to the brief
-        - Next Step: one concrete, executable action
-        - Be specific and practical; avoid generic advice.
-        - Do NOT invent facts not present in the input.
-        - If key information is missing, state an assumption briefly.
-        - If the user request specifies a language (e.g., translate to Arabic), output the entire response in that language.
-
-        FORMAT (STRICT):
-        1. Recommendation:
-        - Rationale:
-        - Next Step:
-        2. Recommendation:
-        - Rationale:
-        - Next Step:
-        3. Recommendation:
-        - Rationale:
-        - Next Step:
+        - Next Step: one concrete action
 
         INPUT_CONTENT:
         {content}
@@ -51,14 +33,31 @@ class RecommenderAgent:
         RECOMMENDATIONS:
         """
 
-        self.prompt = PromptTemplate(input_variables=["content", "user_request"], template=self.template)
+    prompt = PromptTemplate(input_variables=["content", "user_request"], template=template)
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_RECOMMENDER, settings.TEMPERATURE_RECOMMENDER, num_keep=self.num_keep, num_predict=settings.NUM_PREDICT_RECOMMENDER)
+
+    def render(self, content: str, user_request: str) -> str:
+        """Prompt for one call; arun() and run_stream() both send exactly this."""
+        return self.prompt.format(content=compact(content), user_request=user_request)
 
     @trace_agent_execution("recommendation", settings.OLLAMA_MODEL_RECOMMENDER)
-    def run(self, content: str, user_request: str):
+    async def arun(self, content: str, user_request: str):
         try:
             logger.info("Agent: Recommender generating recommendations...")
-            chain = self.prompt | self.llm
-            return chain.invoke({"content": str(content), "user_request": user_request})
+            prompt = self.render(content, user_request)
+            return await cached_ainvoke(self.llm, prompt, "recommendation", f"{user_request}\n{content}")
         except Exception as e:
             logger.error(f"Recommender Error: {e}")
             return "Recommendation generation failed."
+
+    def run(self, content: str, user_request: str):
+        return asyncio.run(self.arun(content, user_request))
+
+    def run_stream(self, content: str, user_request: str) -> Iterator[str]:
+        """Yield the completion as it is generated (for streaming responses)."""
+        prompt = self.render(content, user_request)
+        return cached_stream(self.llm, prompt)
@@ -1,18 +1,14 @@
-from langchain_community.llms import Ollama
+import asyncio
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke
+from ..core.serialize import compact
 
 class RefinerAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_REFINER,
-            temperature=settings.TEMPERATURE_REFINER
-        )
-
-        self.template = """
+    template = """
         SYSTEM:
         You are a Prompt Refinement AI. Your task is to refine and improve user requests based on extracted document information.
         Make the request more specific, actionable, and aligned with the document content.
@@ -33,25 +29,25 @@ class RefinerAgent:
         REFINED REQUEST:
         """
 
-        self.prompt = PromptTemplate(
-            input_variables=["extraction", "user_request"],
-            template=self.template
-        )
+    prompt = PromptTemplate(
+        input_variables=["extraction", "user_request"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_REFINER, settings.TEMPERATURE_REFINER, num_keep=self.num_keep, num_predict=settings.NUM_PREDICT_REFINER)
 
     @trace_agent_execution("refinement", settings.OLLAMA_MODEL_REFINER)
-    def run(self, extraction: dict, user_request: str) -> str:
+    async def arun(self, extraction: dict, user_request: str) -> str:
         """
         Refine the user request based on extraction data.
         """
         try:
             logger.info("Agent: Refiner starting work...")
-
-            chain = self.prompt | self.llm
-
-            response = chain.invoke({
-                "extraction": str(extraction),
-                "user_request": user_request
-            })
+            prompt = self.prompt.format(extraction=compact(extraction), user_request=user_request)
+            response = await cached_ainvoke(self.llm, prompt)
 
             refined_request = response.strip()
             logger.info("Agent: Refinement completed successfully.")
@@ -60,4 +56,7 @@ class RefinerAgent:
         except Exception as e:
             logger.error(f"Agent: Refiner failed with error: {str(e)}")
             # Return original request if refinement fails
-            return user_request
\ No newline at end of file
+            return user_request
+
+    def run(self, extraction: dict, user_request: str) -> str:
+        return asyncio.run(self.arun(extraction, user_request))
\ No newline at end of file
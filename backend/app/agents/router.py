@@ -1,130 +1,221 @@
-from langchain_community.llms import Ollama
+import asyncio
+import re
+from typing import Dict, Iterator, List, Optional, Set, Tuple
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke
+
+# Optional dependency handled gracefully
+try:
+    import ahocorasick
+except ImportError:
+    ahocorasick = None
+
+# Keyword buckets per task. Keywords match whole words ("ad" is not
+# "address"); a trailing "*" marks a stem that matches any word it starts
+# ("ترجم*" also matches "ترجمة"). Nouns every brief mentions ("campaign",
+# "brief", "copy", "subject") only count inside a phrase, since a keyword
+# hit skips the LLM. Tasks are returned in the order their keywords first
+# appear in the request.
+KEYWORDS: Dict[str, Tuple[str, ...]] = {
+    "summarize": ("summar*", "tldr", "brief overview", "short"),
+    "translate": ("translat*", "arabic", "عربي*", "ترجم*"),
+    "analyze": ("analy*", "audit", "assess*", "review"),
+    "recommend": ("recommend*", "suggest*", "ideas", "what should", "next steps"),
+    "ideate": ("idea", "ideas", "brainstorm*", "headline*", "tagline*", "concept*"),
+    "copywrite": ("email*", "subject line*", "ad copy", "email copy", "marketing copy", "copywrit*",
+                  "landing page*", "ad", "ads", "headline*", "cta"),
+    "compliance": ("gdpr", "can-spam", "privacy", "complian*", "opt-out", "unsubscribe"),
+}
+
+_TASK_ORDER: Dict[str, int] = {task: i for i, task in enumerate(KEYWORDS)}
+
+# Keywords (without the "*") that match as word prefixes
+_STEMS = frozenset(keyword[:-1] for keywords in KEYWORDS.values() for keyword in keywords if keyword.endswith("*"))
+
+
+def _keyword_pattern(keyword: str) -> str:
+    """Regex for keyword at a word start, also bounded at its end unless it is a stem."""
+    return r"(?<!\w)" + re.escape(keyword) + ("" if keyword in _STEMS else r"(?!\w)")
+
+
+def _tasks_by_keyword() -> Dict[str, Tuple[str, ...]]:
+    """
+    Tasks each keyword stands for. A keyword also carries the tasks of any
+    keyword matching inside it (a "brief" keyword would also be found in
+    "brief overview"), because a single regex scan only reports the longer match.
+    """
+    owners: Dict[str, Set[str]] = {}
+    for task, keywords in KEYWORDS.items():
+        for keyword in keywords:
+            owners.setdefault(keyword.rstrip("*"), set()).add(task)
+
+    tasks_by_keyword = {}
+    for keyword in owners:
+        tasks: Set[str] = set()
+        for other, other_tasks in owners.items():
+            if re.search(_keyword_pattern(other), keyword):
+                tasks |= other_tasks
+        tasks_by_keyword[keyword] = tuple(sorted(tasks, key=_TASK_ORDER.get))
+    return tasks_by_keyword
+
+
+_TASKS_BY_KEYWORD = _tasks_by_keyword()
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def _build_automaton() -> Optional["ahocorasick.Automaton"]:
+    """One Aho-Corasick automaton over every keyword (None if pyahocorasick is missing)."""
+    if ahocorasick is None:
+        return None
+
+    automaton = ahocorasick.Automaton()
+    for keyword in _TASKS_BY_KEYWORD:
+        automaton.add_word(keyword, keyword)
+    automaton.make_automaton()
+    return automaton
+
 
 class RouterAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_ROUTER
-        )
-        
-        self.template = """
+    template = """
         SYSTEM:
-        You are an Intent Classifier for a Media AI system. 
-        Your job is to read a User Request and decide which agents should handle it.
-        You can select MULTIPLE agents if the request requires it.
-
-        AVAILABLE AGENTS:
-        1. 'summarize': For shorter version, summary, or TL;DR
-        2. 'translate': For translation to Arabic or other languages
-        3. 'analyze': For deep dive, strategic audit, or risk assessment
-        4. 'recommend': For ideas, suggestions, or next steps
-        5. 'ideate': For marketing campaign ideas and themes
-        6. 'copywrite': For drafting marketing copy (emails, ads, landing pages)
-        7. 'compliance': For checking content against privacy and marketing regulations
-
-        RULES:
-        - Return a comma-separated list of agents needed
-        - Order matters: run them in the order you list
-        - Examples:
-          * "Analyze this brief" → analyze
-          * "Translate to Arabic and analyze" → translate,analyze
-          * "Give me a full report" → summarize,analyze,recommend
-          * "Translate this" → translate
-          * "Write email copy" → copywrite
-          * "Generate campaign ideas" → ideation
-          * "What are the recommendations?" → recommend
-          * "Check compliance" → compliance
-          * "Summarize and translate" → summarize,translate
-          * "Analyze and give ideas" → analyze,recommend,ideate
+        You are an Intent Classifier for a Media AI system.
+        Pick the agents that should handle the User Request (one or more, in run order).
+
+        AGENTS:
+        - summarize: summary, shorter version, TL;DR
+        - translate: translation to Arabic or other languages
+        - analyze: deep dive, strategic audit, risk assessment
+        - recommend: suggestions, next steps
+        - ideate: marketing campaign ideas and themes
+        - copywrite: marketing copy (emails, ads, landing pages)
+        - compliance: privacy and marketing regulation checks
+
+        EXAMPLES:
+        "Translate to Arabic and analyze" → translate,analyze
+        "Give me a full report" → summarize,analyze,recommend
+        "Check compliance" → compliance
 
         USER REQUEST: {user_request}
 
         AGENTS NEEDED (comma-separated list only, no explanations):
         """
-        
-        self.prompt = PromptTemplate(
-            input_variables=["user_request"],
-            template=self.template
-        )
+
+    prompt = PromptTemplate(
+        input_variables=["user_request"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    # The answer is one comma-separated line; stop at the first blank line
+    STOP = ("\n\n",)
+
+    VALID_STEPS = list(KEYWORDS)
+    DEFAULT_TASKS = ["analyze"]
+
+    # Keywords decide almost every request with one scan; built once at import
+    _AUTOMATON = _build_automaton()
+    # Otherwise one alternation over all keywords (longest first), so the
+    # request is scanned once inside the re engine
+    _KEYWORD_RE = re.compile(
+        "|".join(_keyword_pattern(keyword) for keyword in sorted(_TASKS_BY_KEYWORD, key=len, reverse=True))
+    )
+
+    def __init__(self):
+        # With ROUTER_LLM_ENABLED off, routing is purely keyword based
+        self.llm = None
+        if settings.ROUTER_LLM_ENABLED:
+            self.llm = get_ollama(settings.OLLAMA_MODEL_ROUTER, settings.TEMPERATURE_ROUTER, num_keep=self.num_keep, num_predict=settings.NUM_PREDICT_ROUTER, stop=self.STOP)
 
     @trace_agent_execution("router", settings.OLLAMA_MODEL_ROUTER)
-    def decide(self, user_request: str) -> list:
+    async def adecide(self, user_request: str) -> list:
         """
         Returns a list of tasks to execute in order.
         Example: ["translate", "analyze"]
         """
         try:
-            logger.info(f"Router: Classifying intent for: '{user_request}'")
-            chain = self.prompt | self.llm
-            response = chain.invoke({"user_request": user_request}).strip().lower()
+            logger.info("Router: Classifying intent for: '%s'", user_request)
+
+            tasks = self._keyword_tasks(user_request)
+            if tasks:
+                logger.info("Router: Keyword match -> %s", tasks)
+                return tasks
+
+            # Only longer requests with no keyword are worth an LLM call
+            if self.llm is None or len(user_request.split()) <= settings.ROUTER_LLM_MIN_WORDS:
+                logger.info("Router: No keyword match, defaulting to %s", self.DEFAULT_TASKS)
+                return list(self.DEFAULT_TASKS)
+
+            prompt = self.prompt.format(user_request=user_request)
+            # Paraphrased requests ("summarize this", "give me a tldr") map to
+            # the same agents, so the router also answers from the semantic cache
+            response = (await cached_ainvoke(self.llm, prompt, "router", user_request)).strip().lower()
             
             # Parse comma-separated response
             tasks = [task.strip() for task in response.split(",")]
             
             # Validate and filter
-            valid_steps = ["summarize", "translate", "analyze", "recommend", "ideate", "copywrite", "compliance"]
             filtered_tasks = []
             
             for task in tasks:
-                for valid in valid_steps:
+                for valid in self.VALID_STEPS:
                     if valid in task and valid not in filtered_tasks:
                         filtered_tasks.append(valid)
                         break
             
-            # Fallback logic based on keywords if LLM fails
             if not filtered_tasks:
-                logger.warning("Router: LLM returned unclear response, using keyword fallback")
-                filtered_tasks = self._keyword_fallback(user_request)
+                logger.warning("Router: LLM returned unclear response, using default")
+                filtered_tasks = list(self.DEFAULT_TASKS)
             
-            logger.info(f"Router: Directed to -> {filtered_tasks}")
+            logger.info("Router: Directed to -> %s", filtered_tasks)
             return filtered_tasks
             
         except Exception as e:
             logger.error(f"Router Error: {e}, using keyword fallback")
             return self._keyword_fallback(user_request)
-    
+
+    def decide(self, user_request: str) -> list:
+        return asyncio.run(self.adecide(user_request))
+
+    def guess(self, user_request: str) -> List[str]:
+        """Keyword-only routing, no LLM; empty when no keyword matches."""
+        return self._keyword_tasks(user_request)
+
     def _keyword_fallback(self, user_request: str) -> list:
         """
-        Keyword-based fallback if LLM fails
+        Keyword-based tasks, defaulting to analyze when nothing matches
         """
-        request_lower = user_request.lower()
-        tasks = []
-        
-        # Check for translation request
-        if any(word in request_lower for word in ["translate", "arabic", "عربي", "ترجم"]):
-            tasks.append("translate")
-        
-        # Check for analysis request
-        if any(word in request_lower for word in ["analyze", "analysis", "audit", "assess", "review", "brief"]):
-            tasks.append("analyze")
-        
-        # Check for summary request
-        if any(word in request_lower for word in ["summarize", "summary", "tldr", "brief overview", "short"]):
-            if "summarize" not in tasks:
-                tasks.insert(0, "summarize")
-        
-        # Check for recommendations
-        if any(word in request_lower for word in ["recommend", "suggestion", "ideas", "what should", "next steps"]):
-            tasks.append("recommend")
-
-        # Marketing ideation
-        if any(word in request_lower for word in ["idea", "ideas", "campaign", "headline", "tagline", "concept"]):
-            tasks.append("ideate")
-
-        # Copywriting hints
-        if any(word in request_lower for word in ["email", "subject", "copy", "landing", "ad", "headline", "cta"]):
-            tasks.append("copywrite")
-
-        # Compliance checks
-        if any(word in request_lower for word in ["gdpr", "can-spam", "privacy", "compliance", "opt-out", "unsubscribe"]):
-            tasks.append("compliance")
-        
-        # Default to analyze if nothing matches
-        if not tasks:
-            tasks = ["analyze"]
-        
-        return tasks
\ No newline at end of file
+        return self._keyword_tasks(user_request) or list(self.DEFAULT_TASKS)
+
+    def _keyword_tasks(self, user_request: str) -> List[str]:
+        """Tasks whose keywords occur in the request, ordered by first occurrence."""
+        text = user_request.lower()
+
+        first_seen: Dict[str, int] = {}
+        for start, keyword in self._keyword_hits(text):
+            for task in _TASKS_BY_KEYWORD[keyword]:
+                if start < first_seen.get(task, len(text)):
+                    first_seen[task] = start
+        return sorted(first_seen, key=lambda task: (first_seen[task], _TASK_ORDER[task]))
+
+    def _keyword_hits(self, text: str) -> Iterator[Tuple[int, str]]:
+        """(start, keyword) for every keyword matching a word (or, for stems, a word start) in text."""
+        if self._AUTOMATON is None:
+            for m in self._KEYWORD_RE.finditer(text):
+                yield m.start(), m.group()
+            return
+
+        for end, keyword in self._AUTOMATON.iter(text):
+            start = end - len(keyword) + 1
+            if start > 0 and _is_word_char(text[start - 1]):
+                continue
+            if keyword not in _STEMS and end + 1 < len(text) and _is_word_char(text[end + 1]):
+                continue
+            yield start, keyword
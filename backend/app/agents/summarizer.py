@@ -1,59 +1,63 @@
-from langchain_community.llms import Ollama
+import asyncio
+from typing import AsyncIterator
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import acached_stream, cached_ainvoke
+from ..core.serialize import compact
 
 class SummarizerAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_SUMMARIZER,
-            temperature=settings.TEMPERATURE_SUMMARIZER
-        )
-        
-        self.template = """
+    template = """
         SYSTEM:
-        You are a senior Media Strategist with strong experience translating marketing briefs into executive-ready insights.
+        You are a senior Media Strategist turning marketing briefs into executive-ready insights.
 
         TASK:
-        Summarize the extracted brief data into a sharp, high-impact executive summary.
-        Your audience is a very busy Creative Director who needs to grasp the idea in under 30 seconds.
-
-        OUTPUT RULES:
-        - Be concise, strategic, and insight-driven.
-        - Avoid fluff, repetition, or generic marketing language.
-        - Do NOT invent information that is not present in the extracted data.
-        - If information is missing, infer cautiously or state it as a constraint.
-        - Use clear, confident language suitable for leadership.
+        Summarize the extracted brief into a sharp executive summary a busy Creative Director can grasp in 30 seconds.
+        Be concise and strategic, with no fluff or generic marketing language.
+        Use only the extracted data; state missing information as a constraint.
 
         FORMAT (STRICT):
-        1. **Big Idea**: One compelling sentence that captures the core strategic idea.
+        1. **Big Idea**: one sentence capturing the core strategic idea.
         2. **Execution**:
-        - Bullet 1: Primary creative direction
-        - Bullet 2: Key channel(s) and content approach
-        - Bullet 3: Core CTA or performance driver
-        3. **Critical Deadline / Constraint**: One sentence covering the most important timing, budget, or limitation.
+        - Primary creative direction
+        - Key channel(s) and content approach
+        - Core CTA or performance driver
+        3. **Critical Deadline / Constraint**: one sentence on the key timing, budget, or limitation.
 
         EXTRACTED DATA:
         {extraction_data}
 
         EXECUTIVE SUMMARY:
         """
-        
-        self.prompt = PromptTemplate(
-            input_variables=["extraction_data"],
-            template=self.template
-        )
+
+    prompt = PromptTemplate(
+        input_variables=["extraction_data"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_SUMMARIZER, settings.TEMPERATURE_SUMMARIZER, num_keep=self.num_keep, num_predict=settings.NUM_PREDICT_SUMMARIZER)
 
     @trace_agent_execution("summary", settings.OLLAMA_MODEL_SUMMARIZER)
-    def run(self, extraction_data: dict):
+    async def arun(self, extraction_data: dict):
         try:
             logger.info("Agent: Summarizer condensing data...")
-            # Convert dict to string for the LLM
-            content_str = str(extraction_data)
-            chain = self.prompt | self.llm
-            return chain.invoke({"extraction_data": content_str})
+            # Compact JSON for the LLM (fewer tokens than str(dict))
+            content_str = compact(extraction_data)
+            prompt = self.prompt.format(extraction_data=content_str)
+            return await cached_ainvoke(self.llm, prompt)
         except Exception as e:
             logger.error(f"Summarizer Error: {e}")
-            return "Summarization failed."
\ No newline at end of file
+            return "Summarization failed."
+
+    def astream(self, extraction_data: dict) -> AsyncIterator[str]:
+        """Yield the summary as it is generated, so dependent work can start early."""
+        prompt = self.prompt.format(extraction_data=compact(extraction_data))
+        return acached_stream(self.llm, prompt)
+
+    def run(self, extraction_data: dict):
+        return asyncio.run(self.arun(extraction_data))
@@ -1,18 +1,28 @@
-from langchain_community.llms import Ollama
+import asyncio
 from langchain_core.prompts import PromptTemplate
 from ..core.config import settings
+from ..core.llm_pool import get_ollama, prefix_tokens
 from ..core.logging import logger
 from ..core.langfuse import trace_agent_execution
+from ..core.llm_cache import cached_ainvoke
+
+# Arabic Unicode block; sampling the head of the text keeps detection constant-time
+_ARABIC = range(0x0600, 0x0700)
+_SAMPLE_CHARS = 512
+_ARABIC_SHARE = 0.3
+
+
+def _is_arabic(text: str) -> bool:
+    """True when over 30% of the letters at the start of text are Arabic."""
+    letters = [ch for ch in text[:_SAMPLE_CHARS] if ch.isalpha()]
+    if not letters:
+        return False
+    arabic = sum(1 for ch in letters if ord(ch) in _ARABIC)
+    return arabic > _ARABIC_SHARE * len(letters)
+
 
 class TranslatorAgent:
-    def __init__(self):
-        self.llm = Ollama(
-            base_url=settings.OLLAMA_BASE_URL,
-            model=settings.OLLAMA_MODEL_TRANSLATOR,
-            temperature=settings.TEMPERATURE_TRANSLATOR
-        )
-        
-        self.template = """
+    template = """
         SYSTEM:
         You are a professional Arabic Translator specializing in Media and Advertising.
         Your task is to translate the provided document analysis into Modern Standard Arabic.
@@ -27,22 +37,33 @@ class TranslatorAgent:
 
         ARABIC TRANSLATION:
         """
-        
-        self.prompt = PromptTemplate(
-            input_variables=["content"],
-            template=self.template
-        )
+
+    prompt = PromptTemplate(
+        input_variables=["content"],
+        template=template
+    )
+
+    num_keep = prefix_tokens(template)
+
+    def __init__(self):
+        self.llm = get_ollama(settings.OLLAMA_MODEL_TRANSLATOR, settings.TEMPERATURE_TRANSLATOR, num_keep=self.num_keep)
+
+    def render(self, content: str) -> str:
+        """Prompt for one call, rendered directly rather than through a Runnable chain."""
+        return self.prompt.format(content=content)
 
     @trace_agent_execution("translation", settings.OLLAMA_MODEL_TRANSLATOR)
-    def run(self, content: str, source_lang: str | None = None):
-        if source_lang == "ar":
+    async def arun(self, content: str, source_lang: str | None = None):
+        # Already Arabic (declared or detected): skip the LLM entirely
+        if source_lang == "ar" or _is_arabic(content):
             return f"Note: Content is already in Arabic. Original: {content}"
         
         try:
             logger.info("Agent: Translator starting Arabic conversion...")
-            chain = self.prompt | self.llm
-            response = chain.invoke({"content": content})
-            return response
+            return await cached_ainvoke(self.llm, self.render(content))
         except Exception as e:
             logger.error(f"Translator Error: {e}")
-            return f"Translation failed: {str(e)}"
\ No newline at end of file
+            return f"Translation failed: {str(e)}"
+
+    def run(self, content: str, source_lang: str | None = None):
+        return asyncio.run(self.arun(content, source_lang))
@@ -1,54 +1,85 @@
-import os
-import shutil
-from fastapi import APIRouter, UploadFile, File, Form, HTTPException
-from ..workflows.process_document import run_document_workflow
+from typing import Any, AsyncIterator, Dict
+from fastapi import APIRouter, UploadFile, File, Form, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from ..workflows.process_document import run_document_workflow, stream_document_workflow
+from ..core.config import settings
 from ..models.schemas.ScoreRequest import ScoreRequest
 from ..models.schemas.AnalysisResponse import AnalysisResponse
 from ..core.logging import logger
 from ..core.langfuse import get_langfuse_client
+from ..core.serialize import compact
 
 router = APIRouter()
 
+# Uploads are read in 1 MiB chunks so the size cap applies as they arrive
+UPLOAD_CHUNK_SIZE = 1 << 20
+
+async def _server_sent_events(events: AsyncIterator[Dict[str, Any]]) -> AsyncIterator[str]:
+    """
+    Format workflow events as SSE. The final result goes through
+    AnalysisResponse like the non-streaming response; a failed run ends
+    with an "error" event instead.
+    """
+    async for event in events:
+        name = event.pop("event")
+        if name == "result":
+            if "error" in event and not event.get("extraction"):
+                name, event = "error", {"detail": event["error"]}
+            else:
+                event = AnalysisResponse(**event).model_dump()
+        yield f"event: {name}\ndata: {compact(event)}\n\n"
+
+
 @router.post("/process-document", response_model=AnalysisResponse)
 async def process_document(
     file: UploadFile = File(...),
-    user_request: str = Form("Analyze this document")
+    user_request: str = Form("Analyze this document"),
+    stream: bool = Query(False)
 ):
     """
     1. Receives file and user intent from Frontend.
-    2. Saves file to a temporary location.
-    3. Executes the LangGraph workflow.
-    4. Cleans up and returns results.
+    2. Reads the file into memory.
+    3. Executes the LangGraph workflow on the bytes.
+    4. Returns results.
+
+    With ?stream=1 the response is a text/event-stream: one "agent" event
+    per agent as it finishes, then the "result" event.
     """
-    
-    # Create temp directory if not exists
-    temp_dir = "temp_uploads"
-    os.makedirs(temp_dir, exist_ok=True)
-    file_path = os.path.join(temp_dir, file.filename)
+    max_bytes = settings.MAX_FILE_SIZE_MB * 1024 * 1024
 
     try:
-        # Save file locally for processing
-        with open(file_path, "wb") as buffer:
-            shutil.copyfileobj(file.file, buffer)
+        # Reject oversized uploads before reading them
+        if file.size is not None and file.size > max_bytes:
+            raise HTTPException(status_code=413, detail=f"File exceeds max size of {settings.MAX_FILE_SIZE_MB} MB")
+
+        file_bytes = bytearray()
+        while chunk := await file.read(UPLOAD_CHUNK_SIZE):
+            file_bytes += chunk
+            if len(file_bytes) > max_bytes:
+                raise HTTPException(status_code=413, detail=f"File exceeds max size of {settings.MAX_FILE_SIZE_MB} MB")
         
-        logger.info(f"API: Received file {file.filename}. Request: {user_request}")
+        logger.info("API: Received file %s. Request: %s", file.filename, user_request)
+
+        if stream:
+            return StreamingResponse(
+                _server_sent_events(stream_document_workflow(bytes(file_bytes), file.filename, user_request)),
+                media_type="text/event-stream"
+            )
 
         # Trigger the workflow
-        result = await run_document_workflow(file_path, user_request)
+        result = await run_document_workflow(bytes(file_bytes), file.filename, user_request)
 
         if "error" in result and not result.get("extraction"):
              raise HTTPException(status_code=500, detail=result["error"])
 
         return result
 
+    except HTTPException:
+        raise
+
     except Exception as e:
         logger.error(f"API Error: {str(e)}")
         raise HTTPException(status_code=500, detail=f"Internal Server Error: {str(e)}")
-    
-    finally:
-        # Cleanup the temp file after processing
-        if os.path.exists(file_path):
-            os.remove(file_path)
 
 
 @router.post("/score-agent")
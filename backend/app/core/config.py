@@ -1,4 +1,5 @@
 from functools import lru_cache
+from pydantic import model_validator
 from pydantic_settings import BaseSettings
 from typing import Optional
 
@@ -16,19 +17,57 @@ class Settings(BaseSettings):
 
     # Ollama (LLM Runtime)
     OLLAMA_BASE_URL: str = "http://localhost:11434"
-    OLLAMA_MODEL_EXTRACTOR: str = "llama3.1"
-    OLLAMA_MODEL_ROUTER: str = "mistral"
-    OLLAMA_MODEL_REFINER: str = "llama3.1"
-    OLLAMA_MODEL_JUDGE: str = "llama3.1"
+    # One primary model serves every agent (roles come from each agent's
+    # SYSTEM prompt), so the server keeps a single hot instance instead of
+    # swapping weights between pipeline stages.
+    # Q4_K_M quantized tag: roughly half the memory bandwidth of fp16 per token.
+    OLLAMA_MODEL_PRIMARY: str = "llama3.1:8b-instruct-q4_K_M"
 
-    OLLAMA_MODEL_SUMMARIZER: str = "llama3.1"
-    OLLAMA_MODEL_TRANSLATOR: str = "mistral"
-    OLLAMA_MODEL_ANALYZER: str = "llama3.1"
-    OLLAMA_MODEL_RECOMMENDER: str = "llama3.1"
+    # Deprecated per-agent overrides; unset ones resolve to OLLAMA_MODEL_PRIMARY.
+    # The Judge only has to emit a score line, so an even smaller quant
+    # (e.g. llama3.1:8b-instruct-q4_0) is safe there.
+    OLLAMA_MODEL_EXTRACTOR: Optional[str] = None
+    OLLAMA_MODEL_ROUTER: Optional[str] = None
+    OLLAMA_MODEL_REFINER: Optional[str] = None
+    OLLAMA_MODEL_JUDGE: Optional[str] = None
+
+    OLLAMA_MODEL_SUMMARIZER: Optional[str] = None
+    OLLAMA_MODEL_TRANSLATOR: Optional[str] = None
+    OLLAMA_MODEL_ANALYZER: Optional[str] = None
+    OLLAMA_MODEL_RECOMMENDER: Optional[str] = None
 
     # Marketing / additional models
-    OLLAMA_MODEL_IDEATION: str = "llama3.1"
-    OLLAMA_MODEL_COPYWRITER: str = "llama3.1"
+    OLLAMA_MODEL_IDEATION: Optional[str] = None
+    OLLAMA_MODEL_COPYWRITER: Optional[str] = None
+
+    # Runtime options passed to every Ollama model (num_gpu=99 offloads all layers)
+    OLLAMA_NUM_CTX: int = 4096
+    OLLAMA_NUM_GPU: int = 99
+    # How long the server keeps the model loaded after each request
+    # ("-1m" pins it for dedicated deployments)
+    OLLAMA_KEEP_ALIVE: str = "30m"
+    # Connection pool shared by all agents' async Ollama calls
+    OLLAMA_HTTP_MAX_CONNECTIONS: int = 32
+    # Agents run concurrently, so the Ollama *server* should be started with
+    # OLLAMA_NUM_PARALLEL=8 and OLLAMA_MAX_LOADED_MODELS=1 (server-side env
+    # vars, not read here; raise the latter only if agents are given
+    # different models); otherwise it serializes the parallel requests.
+    # Generations in flight from this backend; keep it at the server's
+    # OLLAMA_NUM_PARALLEL so excess calls wait here instead of in Ollama's queue
+    OLLAMA_MAX_CONCURRENCY: int = 8
+
+    # Router: keywords decide first; the LLM only classifies longer requests
+    # without any keyword hit (off = never load a model for routing)
+    ROUTER_LLM_ENABLED: bool = True
+    ROUTER_LLM_MIN_WORDS: int = 20
+
+    # When the router selects both summarize and translate, produce the
+    # summary and its Arabic translation in one JSON-mode call
+    FUSE_SUMMARIZE_TRANSLATE: bool = True
+
+    # Start the agents the original request's keywords point to while the
+    # request is still being refined and routed; mispredicted ones are cancelled
+    SPECULATIVE_AGENTS_ENABLED: bool = False
 
     # Model Temperatures
     TEMPERATURE_EXTRACTOR: float = 0.0
@@ -42,15 +81,62 @@ class Settings(BaseSettings):
     TEMPERATURE_IDEATION: float = 0.7
     TEMPERATURE_COPYWRITER: float = 0.5
 
+    # Output token budgets (num_predict) for agents with short, fixed-shape answers
+    NUM_PREDICT_ROUTER: int = 32
+    NUM_PREDICT_SUMMARIZER: int = 256
+    NUM_PREDICT_SUMMARIZE_TRANSLATE: int = 768
+    NUM_PREDICT_REFINER: int = 512
+    NUM_PREDICT_RECOMMENDER: int = 512
+
+    # LLM response cache (exact match on the rendered prompt)
+    LLM_CACHE_ENABLED: bool = True
+    LLM_CACHE_MAX_ENTRIES: int = 4096
+    LLM_CACHE_TTL_SECONDS: int = 3600
+    # Shared second tier for all workers and restarts (needs the redis package; unset = in-process only)
+    REDIS_URL: Optional[str] = None
+
+    # Request batching: concurrent prompts for the same model within the window
+    # are merged into one multi-prompt request (trades answer isolation for throughput)
+    LLM_BATCH_ENABLED: bool = False
+    LLM_BATCH_SIZE: int = 4
+    LLM_BATCH_WINDOW_MS: int = 25
+
+    # Semantic cache (nearest-neighbour reuse of near-duplicate inputs; needs faiss-cpu + sentence-transformers)
+    SEMANTIC_CACHE_ENABLED: bool = False
+    SEMANTIC_CACHE_MODEL: str = "sentence-transformers/all-MiniLM-L6-v2"
+    SEMANTIC_CACHE_THRESHOLD: float = 0.92
+    SEMANTIC_CACHE_MAX_ENTRIES: int = 2048
+    # Directory the indexes are saved to on shutdown and reloaded from (unset = in-memory only)
+    SEMANTIC_CACHE_DIR: Optional[str] = None
+
     # Langfuse (Observability)
     LANGFUSE_PUBLIC_KEY: Optional[str] = None
     LANGFUSE_SECRET_KEY: Optional[str] = None
     LANGFUSE_BASE_URL: str = "https://cloud.langfuse.com"
+    # Block on a flush at the end of each trace (off = background export only)
+    LANGFUSE_ENFORCE_FLUSH: bool = False
+    # Share of successful agent calls, and of requests given per-agent
+    # parallel spans, that is traced (failed agent calls always are)
+    LANGFUSE_SAMPLE_RATE: float = 1.0
+    # Verify the keys against the API once at startup (off the event loop)
+    LANGFUSE_AUTH_CHECK: bool = False
 
     # File Processing
     MAX_FILE_SIZE_MB: int = 20
     ALLOWED_EXTENSIONS: str = "pdf,docx,txt,png,jpg,jpeg,gif"
 
+    # CORS: comma-separated browser origins allowed to call the API (the
+    # frontend's dev server by default; a same-origin deployment needs none)
+    CORS_ORIGINS: str = "http://localhost:3000"
+
+    @model_validator(mode="after")
+    def _default_agent_models(self) -> "Settings":
+        """Point every agent without an explicit override at the primary model."""
+        for name in type(self).model_fields:
+            if name.startswith("OLLAMA_MODEL_") and getattr(self, name) is None:
+                setattr(self, name, self.OLLAMA_MODEL_PRIMARY)
+        return self
+
     class Config:
         env_file = ".env"
         case_sensitive = True
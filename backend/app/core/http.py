@@ -0,0 +1,54 @@
+import asyncio
+import weakref
+import httpx
+from app.core.config import settings
+from app.core.logging import logger
+
+# One pooled client for all Ollama traffic. httpx connection pools belong to
+# the event loop that opened them, so there is one client per running loop:
+# the server's loop in production, plus any loop a blocking run() wrapper starts.
+_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, httpx.AsyncClient]" = weakref.WeakKeyDictionary()
+
+# Generation slots, per loop for the same reason. The server decodes at most
+# OLLAMA_NUM_PARALLEL requests at once; callers beyond that wait here.
+_slots: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Semaphore]" = weakref.WeakKeyDictionary()
+
+
+def _create_client() -> httpx.AsyncClient:
+    limits = httpx.Limits(
+        max_connections=settings.OLLAMA_HTTP_MAX_CONNECTIONS,
+        max_keepalive_connections=settings.OLLAMA_HTTP_MAX_CONNECTIONS,
+    )
+    # No read timeout: a long generation is not an error
+    return httpx.AsyncClient(limits=limits, timeout=httpx.Timeout(None, connect=10.0))
+
+
+def get_ollama_client() -> httpx.AsyncClient:
+    """Shared keep-alive client for the running event loop."""
+    loop = asyncio.get_running_loop()
+    client = _clients.get(loop)
+    if client is None or client.is_closed:
+        client = _clients[loop] = _create_client()
+    return client
+
+
+def ollama_slot() -> asyncio.Semaphore:
+    """Semaphore bounding in-flight Ollama generations on the running loop."""
+    loop = asyncio.get_running_loop()
+    slot = _slots.get(loop)
+    if slot is None:
+        slot = _slots[loop] = asyncio.Semaphore(settings.OLLAMA_MAX_CONCURRENCY)
+    return slot
+
+
+async def init_http_client() -> None:
+    """Open the pool at startup so the first request does not pay for it."""
+    get_ollama_client()
+    logger.info(f"HTTP: Ollama client pool ready ({settings.OLLAMA_HTTP_MAX_CONNECTIONS} connections)")
+
+
+async def close_http_client() -> None:
+    """Close the running loop's client (called on shutdown)."""
+    client = _clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
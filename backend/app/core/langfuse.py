@@ -1,45 +1,205 @@
 from langfuse import Langfuse, get_client, propagate_attributes
-from langfuse.langchain import CallbackHandler
 from app.core.config import settings
+from app.core.logging import logger
+from app.core.serialize import compact
+import asyncio
+import functools
+import hashlib
+import inspect
+import random
+import reprlib
+import threading
 import time
-from typing import Optional, Dict, Any
-
-_langfuse_callback = None
+from contextlib import contextmanager
+from typing import TYPE_CHECKING, Optional, Dict, Any
+from app.utils.output_validator import OutputValidator
+
+if TYPE_CHECKING:
+    # The LangChain integration is heavy to import; it loads on first use only
+    from langfuse.langchain import CallbackHandler
+
+# Optional dependency handled gracefully
+try:
+    import tiktoken
+except ImportError:
+    tiktoken = None
+
+
+def _configured() -> bool:
+    """Whether Langfuse keys are set; without them all tracing is a no-op."""
+    return bool(settings.LANGFUSE_PUBLIC_KEY and settings.LANGFUSE_SECRET_KEY)
+
+
+# Settings are read once at startup, so this is fixed for the process
+LANGFUSE_ENABLED = _configured()
+
+
+# Span inputs are bounded previews: agents receive whole documents, and a
+# full str() of them would be built (and shipped) on every traced call
+_REPR = reprlib.Repr()
+_REPR.maxstring = 256
+_REPR.maxother = 256
+
+
+def _span_input(args, kwargs) -> str:
+    """
+    Bounded preview of an agent call's arguments, serialized here (orjson
+    when installed) because the SDK passes strings through and would
+    otherwise json.dumps the dict itself.
+    """
+    return compact({"args": _REPR.repr(args), "kwargs": _REPR.repr(kwargs)})
+
+
+@functools.lru_cache(maxsize=8)
+def _encoder_for(model: str):
+    """tiktoken encoding for model, or None (tiktoken missing, or a local model it does not know)."""
+    if tiktoken is None:
+        return None
+    try:
+        return tiktoken.encoding_for_model(model)
+    except KeyError:
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    """
+    Token count for usage reporting. Without an encoder for the model (the
+    Ollama case) words are counted with str.count, a C loop, and scaled by
+    the ~4/3 tokens per English word of Llama-style BPE vocabularies.
+    """
+    if not text:
+        return 0
+    encoder = _encoder_for(model)
+    if encoder is not None:
+        return len(encoder.encode(text))
+    return (text.count(" ") + 1) * 4 // 3
+
+
+# Set once under _init_lock; lru_cache alone would let two threads that
+# miss concurrently both construct a client (two pools, two exporter threads)
+_init_lock = threading.Lock()
+_handler: Optional["CallbackHandler"] = None
+_handler_ready = False
+
+
+def _get_handler() -> Optional["CallbackHandler"]:
+    """
+    The shared LangChain callback handler, built once; None when Langfuse
+    keys are not configured, which turns all tracing into a no-op.
+    """
+    global _handler, _handler_ready
+    if _handler_ready:
+        return _handler
+    with _init_lock:
+        if not _handler_ready:
+            _handler = _build_handler()
+            _handler_ready = True
+    return _handler
+
+
+def _build_handler() -> Optional["CallbackHandler"]:
+    if not _configured():
+        return None
+
+    from langfuse.langchain import CallbackHandler
+
+    # CRITICAL: In Langfuse 3.x, you MUST initialize the client first
+    # This creates a singleton that CallbackHandler() will use
+    Langfuse(
+        public_key=settings.LANGFUSE_PUBLIC_KEY,
+        secret_key=settings.LANGFUSE_SECRET_KEY,
+        host=settings.LANGFUSE_BASE_URL,
+    )
+
+    # CRITICAL: CallbackHandler() takes NO arguments in Langfuse 3.x
+    # It automatically uses get_client() internally
+    return CallbackHandler()
 
 
 def init_langfuse():
-    """Initialize Langfuse with credentials from settings."""
-    global _langfuse_callback
-
-    if settings.LANGFUSE_PUBLIC_KEY and settings.LANGFUSE_SECRET_KEY:
-        # CRITICAL: In Langfuse 3.x, you MUST initialize the client first
-        # This creates a singleton that CallbackHandler() will use
-        Langfuse(
-            public_key=settings.LANGFUSE_PUBLIC_KEY,
-            secret_key=settings.LANGFUSE_SECRET_KEY,
-            host=settings.LANGFUSE_BASE_URL,
-        )
-        
-        # CRITICAL: CallbackHandler() takes NO arguments in Langfuse 3.x
-        # It automatically uses get_client() internally
-        _langfuse_callback = CallbackHandler()
+    """Initialize Langfuse with credentials from settings (once per process; later calls are no-ops)."""
+    _get_handler()
+
+
+async def check_langfuse_auth() -> None:
+    """
+    Opt-in (LANGFUSE_AUTH_CHECK) credential check at startup. auth_check()
+    is a blocking API call, so it runs in a worker thread; failures are
+    logged and never stop the app from starting.
+    """
+    client = get_langfuse_client()
+    if not settings.LANGFUSE_AUTH_CHECK or client is None:
+        return
+    try:
+        await asyncio.to_thread(client.auth_check)
+        logger.info("Langfuse: credentials verified")
+    except Exception as e:
+        logger.warning(f"Langfuse: auth check failed: {e}")
+
+
+async def flush_langfuse() -> None:
+    """
+    Export the spans still queued at shutdown. flush() blocks on the
+    exporter's network I/O, so it runs in a worker thread; requests never
+    wait on it (see LangfuseTracer.end_trace).
+    """
+    client = get_langfuse_client()
+    if client is None:
+        return
+    try:
+        await asyncio.to_thread(client.flush)
+    except Exception as e:
+        logger.warning(f"Langfuse: flush on shutdown failed: {e}")
 
 
 def get_langfuse_callback():
     """Get the LangChain callback handler."""
-    return _langfuse_callback
+    return _get_handler()
 
 
+@functools.lru_cache(maxsize=1)
 def get_langfuse_client():
-    """Get the Langfuse client for manual operations."""
+    """Get the Langfuse client for manual operations (None when not configured)."""
+    if _get_handler() is None:
+        return None
     return get_client()
 
 
+def in_sample(trace_id: Optional[str], rate: float) -> bool:
+    """
+    Whether a trace falls in the sampled share. Hashing the trace id keeps
+    the decision consistent for every span of one request; without an id
+    the draw is random.
+    """
+    if rate >= 1.0:
+        return True
+    if not trace_id:
+        return random.random() < rate
+    digest = hashlib.blake2b(trace_id.encode(), digest_size=8).digest()
+    return int.from_bytes(digest, "big") / 2**64 < rate
+
+
+def get_sampled_langfuse_client():
+    """
+    The Langfuse client when the current trace is in the LANGFUSE_SAMPLE_RATE
+    sample, else None, so per-request manual spans are skipped for the rest.
+    """
+    client = get_langfuse_client()
+    if client is None or in_sample(client.get_current_trace_id(), settings.LANGFUSE_SAMPLE_RATE):
+        return client
+    return None
+
+
 class LangfuseTracer:
     """Enhanced tracer for agent observability using Langfuse 3.x API."""
 
     def __init__(self):
+        # Build the configured client first; a bare get_client() would
+        # otherwise construct a second, environment-configured one
+        _get_handler()
         self.client = get_client()
+        # Every method returns at once when tracing is off, before building any payload
+        self._enabled = _configured() and self.client is not None
 
     def start_trace(self, name: str, user_id: Optional[str] = None,
                    session_id: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None,
@@ -54,7 +214,7 @@ class LangfuseTracer:
         - Input/output on root observation become trace input/output
         - Use update_trace() to set trace-level input/output explicitly
         """
-        if not self.client:
+        if not self._enabled:
             return None
 
         # Build trace context attributes (NO TAGS HERE)
@@ -67,7 +227,7 @@ class LangfuseTracer:
             trace_attrs['metadata'] = metadata
         # CRITICAL: Set input on root observation - becomes trace input
         if input_data:
-            trace_attrs['input'] = input_data
+            trace_attrs['input'] = compact(input_data)
         # IMPORTANT: Do NOT include 'tags' in trace_attrs - it's not supported
 
         # Create a wrapper class to handle tags via propagate_attributes
@@ -98,7 +258,7 @@ class LangfuseTracer:
             def __exit__(self, exc_type, exc_val, exc_tb):
                 # Set output if provided
                 if self.output_data and self.span:
-                    self.span.update(output=self.output_data)
+                    self.span.update(output=compact(self.output_data))
                 
                 result = self.span.__exit__(exc_type, exc_val, exc_tb)
                 if self.tags:
@@ -110,12 +270,11 @@ class LangfuseTracer:
     def log_generation(self, parent_span, name: str, model: str, prompt: str,
                       completion: str, metadata: Optional[Dict[str, Any]] = None):
         """Log a generation (LLM call) with prompt and completion."""
-        if not parent_span:
+        if not self._enabled or not parent_span:
             return None
 
-        # Estimate tokens (rough approximation: 1 token ≈ 4 characters)
-        prompt_tokens = len(prompt) // 4
-        completion_tokens = len(completion) // 4
+        prompt_tokens = count_tokens(prompt, model)
+        completion_tokens = count_tokens(completion, model)
         total_tokens = prompt_tokens + completion_tokens
 
         # Estimate cost (very rough, adjust based on your model pricing)
@@ -126,8 +285,10 @@ class LangfuseTracer:
             "completion_tokens": completion_tokens,
             "total_tokens": total_tokens,
             "estimated_cost": estimated_cost,
-            **(metadata or {})
         }
+        if metadata:
+            # Caller metadata still takes precedence over the computed fields
+            generation_metadata.update(metadata)
 
         # Create generation as child of parent span
         generation = parent_span.start_as_current_observation(
@@ -149,7 +310,7 @@ class LangfuseTracer:
     def add_score(self, span_or_generation, name: str, value: float,
                  comment: Optional[str] = None, metadata: Optional[Dict[str, Any]] = None):
         """Add a score to a span or generation."""
-        if not span_or_generation:
+        if not self._enabled or not span_or_generation:
             return
 
         span_or_generation.score(
@@ -162,32 +323,32 @@ class LangfuseTracer:
     def add_span(self, parent_span, name: str, input_data: Optional[Dict[str, Any]] = None,
                 output_data: Optional[Dict[str, Any]] = None, metadata: Optional[Dict[str, Any]] = None):
         """Add a child span for agent operations."""
-        if not parent_span:
+        if not self._enabled or not parent_span:
             return None
 
         # Create child span
         child_span = parent_span.start_as_current_observation(
             as_type="span",
             name=name,
-            input=input_data or {},
+            input=compact(input_data or {}),
             metadata=metadata or {}
         )
         
         # If output_data is provided, update the span
         if output_data and child_span:
-            child_span.update(output=output_data)
+            child_span.update(output=compact(output_data))
         
         return child_span
 
     def update_span(self, span, output_data: Optional[Dict[str, Any]] = None,
                    metadata: Optional[Dict[str, Any]] = None):
         """Update a span with output or metadata."""
-        if not span:
+        if not self._enabled or not span:
             return
         
         update_dict = {}
         if output_data:
-            update_dict['output'] = output_data
+            update_dict['output'] = compact(output_data)
         if metadata:
             update_dict['metadata'] = metadata
             
@@ -196,93 +357,168 @@ class LangfuseTracer:
 
     def end_trace(self, span):
         """
-        End the trace/span and flush data to Langfuse.
-        In Langfuse 3.x with context managers, this is usually handled automatically,
-        but we can explicitly flush here for short-lived apps.
+        End the trace/span. The SDK exports in the background and flushes
+        at exit, so a blocking flush here only runs when LANGFUSE_ENFORCE_FLUSH
+        is set (e.g. for short-lived scripts).
         """
-        if span and self.client:
+        if self._enabled and span and settings.LANGFUSE_ENFORCE_FLUSH:
             self.client.flush()
 
 
+@functools.lru_cache(maxsize=None)
+def _span_fields(agent_name: str, model_name: str):
+    """
+    Per-agent constants of every agent observation: (name, tags, metadata).
+    Built once and shared read-only; the SDK copies them into span attributes.
+    """
+    return f"agent_{agent_name}", [agent_name, "agent"], {"agent": agent_name, "model": model_name}
+
+
+@contextmanager
+def _agent_span(agent_name: str, model_name: str, args, kwargs):
+    """
+    Open one generation observation around an agent call (a single SDK
+    enqueue instead of nested agent/execution/generation spans).
+    Yields a callback that records the result, or None when tracing is off.
+    """
+    tracer = get_langfuse_tracer()
+    if not tracer._enabled:
+        yield None
+        return
+
+    name, tags, metadata = _span_fields(agent_name, model_name)
+
+    # Use propagate_attributes for tags, then start observation
+    with propagate_attributes(tags=tags):
+        with tracer.client.start_as_current_observation(
+            as_type="generation",
+            name=name,
+            model=model_name,
+            input=_span_input(args, kwargs),
+            metadata=metadata
+        ) as span:
+            # The span carries wall-clock start/end; only the duration is added
+            started = time.perf_counter_ns()
+
+            def duration_ms() -> float:
+                return (time.perf_counter_ns() - started) / 1e6
+
+            def record(agent, result):
+                elapsed = duration_ms()
+
+                # Validate and score
+                is_valid = OutputValidator.validate_agent_output(agent_name, result)
+
+                span.update(
+                    output=str(result)[:500],
+                    metadata={"duration_ms": elapsed, "success": True}
+                )
+                span.score(
+                    name=f"{agent_name}_validation",
+                    value=1.0 if is_valid else 0.0,
+                    comment="Output format validation",
+                    data_type="NUMERIC"
+                )
+
+            try:
+                yield record
+            except Exception as e:
+                # Update the span with the error
+                span.update(
+                    level="ERROR",
+                    status_message=str(e),
+                    metadata={"error": str(e), "success": False, "duration_ms": duration_ms()}
+                )
+                raise
+
+
+def _trace_failure(agent_name: str, model_name: str, args, kwargs, error: Exception) -> None:
+    """Record a failed call that was not sampled; failures are always traced."""
+    tracer = get_langfuse_tracer()
+    if not tracer._enabled:
+        return
+    name, _, metadata = _span_fields(agent_name, model_name)
+    with tracer.client.start_as_current_observation(
+        as_type="generation",
+        name=name,
+        model=model_name,
+        input=_span_input(args, kwargs),
+        level="ERROR",
+        status_message=str(error),
+        metadata={**metadata, "error": str(error), "success": False, "sampled": False}
+    ):
+        pass
+
+
 def trace_agent_execution(agent_name: str, model_name: str):
-    """Decorator for tracing agent executions."""
+    """
+    Decorator for tracing agent executions (sync or async methods).
+    Without Langfuse keys (checked once, at decoration time) the method is
+    returned unwrapped, so untraced calls cost nothing. Otherwise successful
+    calls are traced only when their trace is in the sample (the same
+    per-trace decision as get_sampled_langfuse_client); failures always are.
+    """
     def decorator(func):
+        if not _configured():
+            return func
+
+        if inspect.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                if get_sampled_langfuse_client() is None:
+                    try:
+                        return await func(self, *args, **kwargs)
+                    except Exception as e:
+                        _trace_failure(agent_name, model_name, args, kwargs, e)
+                        raise
+
+                with _agent_span(agent_name, model_name, args, kwargs) as record:
+                    result = await func(self, *args, **kwargs)
+                    if record:
+                        record(self, result)
+                    return result
+
+            return async_wrapper
+
+        @functools.wraps(func)
         def wrapper(self, *args, **kwargs):
-            tracer = get_langfuse_tracer()
-            if not tracer.client:
-                return func(self, *args, **kwargs)
-
-            # Use propagate_attributes for tags, then start observation
-            with propagate_attributes(tags=[agent_name, "agent"]):
-                with tracer.client.start_as_current_observation(
-                    as_type="span",
-                    name=f"agent_{agent_name}",
-                    metadata={"agent": agent_name, "model": model_name}
-                ) as trace_span:
-                    
-                    # Add execution span
-                    with trace_span.start_as_current_observation(
-                        as_type="span",
-                        name=f"{agent_name}_execution",
-                        input={"args": str(args), "kwargs": str(kwargs)},
-                        metadata={"start_time": time.time()}
-                    ) as exec_span:
-
-                        try:
-                            # Execute the agent
-                            result = func(self, *args, **kwargs)
-
-                            # Log the generation
-                            prompt = getattr(self, 'template', 'No template available')
-                            if hasattr(self, 'prompt') and hasattr(self.prompt, 'template'):
-                                prompt = self.prompt.template
-
-                            with trace_span.start_as_current_observation(
-                                as_type="generation",
-                                name=f"{agent_name}_llm_call",
-                                model=model_name,
-                                input=prompt,
-                                output=str(result),
-                                metadata={"agent": agent_name}
-                            ):
-                                pass  # Generation is automatically recorded
-
-                            # Validate and score
-                            from app.utils.output_validator import OutputValidator
-                            is_valid = OutputValidator.validate_agent_output(agent_name, result)
-                            
-                            trace_span.score(
-                                name=f"{agent_name}_validation",
-                                value=1.0 if is_valid else 0.0,
-                                comment="Output format validation",
-                                data_type="NUMERIC"
-                            )
-
-                            # Update execution span with success
-                            exec_span.update(
-                                output={"result": str(result)[:500]},
-                                metadata={"end_time": time.time(), "success": True}
-                            )
-
-                            return result
-
-                        except Exception as e:
-                            # Update execution span with error
-                            exec_span.update(
-                                metadata={"error": str(e), "success": False, "end_time": time.time()}
-                            )
-                            raise
+            if get_sampled_langfuse_client() is None:
+                try:
+                    return func(self, *args, **kwargs)
+                except Exception as e:
+                    _trace_failure(agent_name, model_name, args, kwargs, e)
+                    raise
+
+            with _agent_span(agent_name, model_name, args, kwargs) as record:
+                result = func(self, *args, **kwargs)
+                if record:
+                    record(self, result)
+                return result
 
         return wrapper
     return decorator
 
 
-# Global tracer instance
+# Global tracer instance (its constructor takes _init_lock, hence its own lock)
 _tracer = None
+_tracer_lock = threading.Lock()
 
 
 def get_langfuse_tracer():
     global _tracer
     if _tracer is None:
-        _tracer = LangfuseTracer()
-    return _tracer
\ No newline at end of file
+        with _tracer_lock:
+            if _tracer is None:
+                _tracer = LangfuseTracer()
+    return _tracer
+
+
+def _noop(self, *args, **kwargs):
+    return None
+
+
+if not LANGFUSE_ENABLED:
+    # Tracing is off for the whole process: replace the tracer methods
+    # outright instead of re-checking _enabled on every call
+    for _method in ("start_trace", "log_generation", "add_score", "add_span", "update_span", "end_trace"):
+        setattr(LangfuseTracer, _method, _noop)
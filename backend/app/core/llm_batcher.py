@@ -0,0 +1,147 @@
+import asyncio
+import re
+import weakref
+from typing import Dict, List, Tuple
+from app.core.config import settings
+from app.core.logging import logger
+
+# Batched answers are split back apart on these numbered headers
+_ANSWER_HEADER = re.compile(r"^### ANSWER (\d+)[ \t]*$", re.MULTILINE)
+
+_BATCH_PREAMBLE = (
+    "You will receive several independent requests, each under a '### PROMPT N' header.\n"
+    "Answer every request separately and completely, following its own instructions.\n"
+    "Start each answer with a line containing only '### ANSWER N', using the same number as its prompt.\n"
+)
+
+
+class LLMBatcher:
+    """
+    Coalesces prompts for one model that arrive within a short window
+    and sends them to the server as a single multi-prompt request.
+    """
+
+    def __init__(self, llm, max_batch: int, window_ms: int):
+        self.llm = llm
+        self.max_batch = max_batch
+        self.window = window_ms / 1000
+        self._queue: "asyncio.Queue[Tuple[str, asyncio.Future]]" = asyncio.Queue()
+        self._worker = None
+
+    async def submit(self, prompt: str) -> str:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._queue.put_nowait((prompt, future))
+        if self._worker is None or self._worker.done():
+            self._worker = loop.create_task(self._collect())
+        return await future
+
+    async def _collect(self) -> None:
+        loop = asyncio.get_running_loop()
+        while not self._queue.empty():
+            batch = [self._queue.get_nowait()]
+            deadline = loop.time() + self.window
+            while len(batch) < self.max_batch:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self._queue.get(), remaining))
+                except asyncio.TimeoutError:
+                    break
+            # Dispatch in the background so the next window starts filling now
+            loop.create_task(self._dispatch(batch))
+
+    async def _dispatch(self, batch: List[Tuple[str, asyncio.Future]]) -> None:
+        prompts = [prompt for prompt, _ in batch]
+        try:
+            if len(batch) == 1:
+                answers = [await self.llm.ainvoke(prompts[0])]
+            else:
+                logger.info("LLM batcher: sending %d prompts to %s in one request", len(batch), self.llm.model)
+                answers = self._split(await self.llm.ainvoke(self._render(prompts), **self._budget(len(batch))), len(batch))
+                missing = [i for i, answer in enumerate(answers) if answer is None]
+                if missing:
+                    logger.warning(f"LLM batcher: {len(missing)} answer(s) missing from batch, re-sending individually")
+                    resent = await asyncio.gather(*(self.llm.ainvoke(prompts[i]) for i in missing))
+                    for i, answer in zip(missing, resent):
+                        answers[i] = answer
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), answer in zip(batch, answers):
+            if not future.done():
+                future.set_result(answer)
+
+    def _budget(self, count: int) -> dict:
+        """A per-answer num_predict cap must cover every answer in a batch."""
+        num_predict = getattr(self.llm, "num_predict", None)
+        return {"num_predict": num_predict * count} if num_predict else {}
+
+    @staticmethod
+    def _render(prompts: List[str]) -> str:
+        blocks = "\n\n".join(f"### PROMPT {i}\n{prompt}" for i, prompt in enumerate(prompts, start=1))
+        return f"{_BATCH_PREAMBLE}\n{blocks}\n"
+
+    @staticmethod
+    def _split(response: str, count: int) -> List[str]:
+        """Answers by prompt number; None where the response has no such section."""
+        answers = [None] * count
+        headers = list(_ANSWER_HEADER.finditer(response))
+        for header, following in zip(headers, headers[1:] + [None]):
+            number = int(header.group(1))
+            if 1 <= number <= count:
+                end = following.start() if following else len(response)
+                answers[number - 1] = response[header.end():end].strip()
+        return answers
+
+
+# Queues belong to an event loop, so batchers are kept per running loop
+_batchers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, Dict[tuple, LLMBatcher]]" = weakref.WeakKeyDictionary()
+
+# Upper bounds (in tokens) of the expected-output-length bins. A packed
+# request finishes with its longest answer, so only prompts expecting
+# similar lengths share one; each bin fills and flushes on its own.
+_LENGTH_BINS = (128, 512, 2048)
+
+
+def length_bin(llm, prompt: str) -> int:
+    """
+    Bin of the expected answer length: the model's num_predict cap when set,
+    else the prompt's own length (~4 characters per token), since the
+    uncapped agents (translation, analysis, copy) answer in proportion to
+    their input.
+    """
+    expected = getattr(llm, "num_predict", None) or len(prompt) // 4
+    for i, bound in enumerate(_LENGTH_BINS):
+        if expected < bound:
+            return i
+    return len(_LENGTH_BINS)
+
+
+def get_batcher(llm, prompt: str = "") -> LLMBatcher:
+    loop_batchers = _batchers.setdefault(asyncio.get_running_loop(), {})
+    key = (llm.model, llm.temperature, getattr(llm, "num_predict", None), length_bin(llm, prompt))
+    if key not in loop_batchers:
+        loop_batchers[key] = LLMBatcher(llm, settings.LLM_BATCH_SIZE, settings.LLM_BATCH_WINDOW_MS)
+    return loop_batchers[key]
+
+
+def packable(llm) -> bool:
+    """
+    Whether prompts for llm can share one request. JSON mode cannot emit the
+    '### ANSWER N' sections, and a stop sequence would cut the batched answer
+    off after its first section; those calls go out on their own (Ollama
+    still decodes concurrent requests together, up to OLLAMA_NUM_PARALLEL).
+    """
+    return not getattr(llm, "format", None) and not getattr(llm, "stop", None)
+
+
+async def batched_ainvoke(llm, prompt: str) -> str:
+    """llm.ainvoke(prompt), coalesced with concurrent prompts for the same model."""
+    if not packable(llm):
+        return await llm.ainvoke(prompt)
+    return await get_batcher(llm, prompt).submit(prompt)
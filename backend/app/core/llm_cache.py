@@ -0,0 +1,206 @@
+import functools
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from typing import AsyncIterator, Awaitable, Callable, Iterator, Optional, Tuple
+from app.core.config import settings
+from app.core import redis_cache
+from app.core.llm_batcher import batched_ainvoke
+from app.core.semantic_cache import get_semantic_cache
+
+# In-process LRU of LLM completions, keyed by a digest of the exact
+# rendered prompt plus the model parameters that affect the output.
+# Values are (completion, expiry on the monotonic clock).
+_cache: "OrderedDict[str, Tuple[str, float]]" = OrderedDict()
+_lock = threading.Lock()
+
+
+def cache_key(prompt: str, model: str, temperature) -> str:
+    """Content-addressed key for a (prompt, model, temperature) triple."""
+    digest = hashlib.blake2b(digest_size=16)
+    digest.update(f"{model}\x00{temperature}\x00".encode())
+    digest.update(prompt.encode())
+    return digest.hexdigest()
+
+
+def get(key: str):
+    """Return the cached completion for key, or None (also once it has expired)."""
+    with _lock:
+        entry = _cache.get(key)
+        if entry is None:
+            return None
+        value, expires_at = entry
+        if expires_at <= time.monotonic():
+            del _cache[key]
+            return None
+        _cache.move_to_end(key)
+        return value
+
+
+def put(key: str, value: str) -> None:
+    """Store a completion, evicting the least recently used entries."""
+    with _lock:
+        _cache[key] = (value, time.monotonic() + settings.LLM_CACHE_TTL_SECONDS)
+        _cache.move_to_end(key)
+        while len(_cache) > settings.LLM_CACHE_MAX_ENTRIES:
+            _cache.popitem(last=False)
+
+
+def _local(key: str, shared: Optional[str]) -> Optional[str]:
+    """Copy a hit from the shared (Redis) tier into the in-process LRU."""
+    if shared is not None:
+        put(key, shared)
+    return shared
+
+
+def _semantic_lookup(key: str, namespace: Optional[str], semantic_text: Optional[str]):
+    """Nearest-neighbour fallback after an exact miss; returns (response or None, semantic cache, embedding)."""
+    semantic = get_semantic_cache(namespace) if namespace and semantic_text is not None else None
+    response = vector = None
+    if semantic is not None:
+        response, vector = semantic.lookup(semantic_text)
+        if response is not None:
+            put(key, response)
+    return response, semantic, vector
+
+
+def _store(key: str, response: str, semantic, vector) -> None:
+    put(key, response)
+    if semantic is not None:
+        semantic.add(vector, response)
+
+
+def cached_invoke(llm, prompt: str, namespace: Optional[str] = None, semantic_text: Optional[str] = None) -> str:
+    """
+    Invoke the LLM on an already-rendered prompt, reusing the completion
+    of any byte-identical earlier call for the same model settings.
+
+    With REDIS_URL set, an in-process miss is looked up in Redis, which all
+    workers share. When namespace and semantic_text are given and the
+    semantic cache is enabled, an exact miss then falls back to a
+    nearest-neighbour lookup on semantic_text (the variable part of the
+    prompt) before calling the LLM.
+    """
+    if not settings.LLM_CACHE_ENABLED:
+        return llm.invoke(prompt)
+
+    key = cache_key(prompt, llm.model, llm.temperature)
+    response = get(key)
+    if response is None:
+        response = _local(key, redis_cache.get(key))
+    if response is not None:
+        return response
+
+    response, semantic, vector = _semantic_lookup(key, namespace, semantic_text)
+    if response is None:
+        response = llm.invoke(prompt)
+        _store(key, response, semantic, vector)
+        redis_cache.put(key, response)
+    return response
+
+
+async def cached_ainvoke(llm, prompt: str, namespace: Optional[str] = None, semantic_text: Optional[str] = None) -> str:
+    """Async counterpart of cached_invoke, awaiting llm.ainvoke on a miss."""
+    produce = functools.partial(batched_ainvoke, llm) if settings.LLM_BATCH_ENABLED else llm.ainvoke
+    return await cached_acall(llm, prompt, produce, namespace, semantic_text)
+
+
+async def cached_acall(
+    llm,
+    prompt: str,
+    produce: Callable[[str], Awaitable[str]],
+    namespace: Optional[str] = None,
+    semantic_text: Optional[str] = None,
+) -> str:
+    """Like cached_ainvoke, but a miss is served by produce(prompt) (e.g. a streaming reader)."""
+    if not settings.LLM_CACHE_ENABLED:
+        return await produce(prompt)
+
+    key = cache_key(prompt, llm.model, llm.temperature)
+    response = get(key)
+    if response is None:
+        response = _local(key, await redis_cache.aget(key))
+    if response is not None:
+        return response
+
+    response, semantic, vector = _semantic_lookup(key, namespace, semantic_text)
+    if response is None:
+        response = await produce(prompt)
+        _store(key, response, semantic, vector)
+        await redis_cache.aput(key, response)
+    return response
+
+
+async def alookup(llm, prompt: str) -> Optional[str]:
+    """Cached completion of a byte-identical earlier call (either tier), without calling the LLM."""
+    if not settings.LLM_CACHE_ENABLED:
+        return None
+    key = cache_key(prompt, llm.model, llm.temperature)
+    response = get(key)
+    if response is None:
+        response = _local(key, await redis_cache.aget(key))
+    return response
+
+
+async def astore(llm, prompt: str, response: str) -> None:
+    """Record response as the completion of prompt, as if the LLM had answered it."""
+    if not settings.LLM_CACHE_ENABLED:
+        return
+    key = cache_key(prompt, llm.model, llm.temperature)
+    put(key, response)
+    await redis_cache.aput(key, response)
+
+
+def cached_stream(llm, prompt: str) -> Iterator[str]:
+    """
+    Yield the completion chunk by chunk. A cached completion is yielded
+    whole; a fresh one is stored only once the stream has been fully read.
+    """
+    key = cache_key(prompt, llm.model, llm.temperature)
+    response = None
+    if settings.LLM_CACHE_ENABLED:
+        response = get(key)
+        if response is None:
+            response = _local(key, redis_cache.get(key))
+    if response is not None:
+        yield response
+        return
+
+    chunks = []
+    for chunk in llm.stream(prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    if settings.LLM_CACHE_ENABLED:
+        response = "".join(chunks)
+        put(key, response)
+        redis_cache.put(key, response)
+
+
+async def acached_stream(llm, prompt: str) -> AsyncIterator[str]:
+    """Async counterpart of cached_stream, streaming on the shared client (llm.astream_text)."""
+    key = cache_key(prompt, llm.model, llm.temperature)
+    response = None
+    if settings.LLM_CACHE_ENABLED:
+        response = get(key)
+        if response is None:
+            response = _local(key, await redis_cache.aget(key))
+    if response is not None:
+        yield response
+        return
+
+    chunks = []
+    async for chunk in llm.astream_text(prompt):
+        chunks.append(chunk)
+        yield chunk
+
+    if settings.LLM_CACHE_ENABLED:
+        response = "".join(chunks)
+        put(key, response)
+        await redis_cache.aput(key, response)
+
+
+def clear() -> None:
+    with _lock:
+        _cache.clear()
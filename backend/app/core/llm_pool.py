@@ -0,0 +1,144 @@
+import json
+from functools import lru_cache
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+from langchain_community.llms import Ollama
+from langchain_core.outputs import Generation, LLMResult
+from app.core.config import settings
+from app.core.http import get_ollama_client, ollama_slot
+
+
+class ResidentOllama(Ollama):
+    """
+    Ollama LLM that sends keep_alive with every request, so the server keeps
+    the model loaded between calls instead of unloading it after its default idle time.
+    num_keep pins that many leading prompt tokens (the static instructions)
+    when the context window has to be shifted; num_predict caps the output.
+    """
+
+    keep_alive: Optional[str] = None
+    num_keep: Optional[int] = None
+    num_predict: Optional[int] = None
+
+    @property
+    def _default_params(self) -> Dict[str, Any]:
+        params = super()._default_params
+        if self.keep_alive is not None:
+            params["keep_alive"] = self.keep_alive
+        if self.num_keep is not None:
+            params["options"]["num_keep"] = self.num_keep
+        if self.num_predict is not None:
+            params["options"]["num_predict"] = self.num_predict
+        return params
+
+    async def _agenerate(
+        self,
+        prompts: List[str],
+        stop: Optional[List[str]] = None,
+        images: Optional[List[str]] = None,
+        run_manager=None,
+        **kwargs: Any,
+    ) -> LLMResult:
+        """
+        ainvoke() as a plain /api/generate POST on the shared keep-alive client
+        (core.http), instead of an aiohttp session per call. Each generation
+        holds an ollama_slot() while it runs.
+        The sync path (invoke/stream) is unchanged.
+        """
+        client = get_ollama_client()
+        generations = []
+        for prompt in prompts:
+            async with ollama_slot():
+                response = await client.post(
+                    f"{self.base_url}/api/generate",
+                    json=self._payload(prompt, stop, images, kwargs, stream=False),
+                )
+            if response.status_code != 200:
+                raise ValueError(
+                    f"Ollama call failed with status code {response.status_code}. Details: {response.text}"
+                )
+            body = response.json()
+            generations.append([Generation(text=body["response"], generation_info=body)])
+        return LLMResult(generations=generations)
+
+    async def astream_text(self, prompt: str, stop: Optional[List[str]] = None, **kwargs: Any) -> AsyncIterator[str]:
+        """
+        Stream completion text chunks on the shared client, holding an
+        ollama_slot() until the stream is closed. Closing early (e.g. via
+        contextlib.aclosing on break) drops the connection, which makes
+        Ollama stop generating.
+        """
+        client = get_ollama_client()
+        async with ollama_slot():
+            async with client.stream(
+                "POST",
+                f"{self.base_url}/api/generate",
+                json=self._payload(prompt, stop, None, kwargs, stream=True),
+            ) as response:
+                if response.status_code != 200:
+                    await response.aread()
+                    raise ValueError(
+                        f"Ollama call failed with status code {response.status_code}. Details: {response.text}"
+                    )
+                async for line in response.aiter_lines():
+                    if line:
+                        yield json.loads(line).get("response", "")
+
+    def _payload(self, prompt: str, stop, images, kwargs: Dict[str, Any], stream: bool) -> Dict[str, Any]:
+        params = self._default_params
+        options = {key: value for key, value in {**params["options"], **kwargs}.items() if value is not None}
+        if stop is not None:
+            options["stop"] = stop
+        payload = {
+            "model": params["model"],
+            "prompt": prompt,
+            "system": params["system"],
+            "template": params["template"],
+            "format": params["format"],
+            "images": images,
+            "options": options,
+            "keep_alive": params.get("keep_alive"),
+            "stream": stream,
+        }
+        return {key: value for key, value in payload.items() if value is not None}
+
+
+def prefix_tokens(template: str) -> int:
+    """
+    Conservative token count of the static text before a template's first
+    variable. Every agent passes it as num_keep: that prefix is identical on
+    every call, so Ollama keeps those tokens when it has to shift the
+    context window. Ollama has no stable tokenize endpoint, so this assumes
+    ~4 characters per token; undercounting only pins fewer tokens.
+    """
+    return len(template.split("{", 1)[0]) // 4
+
+
+@lru_cache(maxsize=16)
+def get_ollama(
+    model: str,
+    temperature: Optional[float] = None,
+    format: Optional[str] = None,
+    num_keep: Optional[int] = None,
+    num_predict: Optional[int] = None,
+    stop: Optional[Tuple[str, ...]] = None,
+) -> Ollama:
+    """
+    Shared Ollama LLM per (model, temperature, format, num_keep, num_predict, stop),
+    so agents with identical settings (and both judge instances) share one client.
+    format="json" turns on Ollama's JSON mode (decoding constrained to valid JSON).
+    num_keep is the agent's static prompt prefix length (see prefix_tokens).
+    num_predict and stop bound the generation for short-output agents. num_ctx
+    stays global: changing it per call would make the server reload the model.
+    """
+    return ResidentOllama(
+        base_url=settings.OLLAMA_BASE_URL,
+        model=model,
+        temperature=temperature,
+        num_ctx=settings.OLLAMA_NUM_CTX,
+        num_gpu=settings.OLLAMA_NUM_GPU,
+        keep_alive=settings.OLLAMA_KEEP_ALIVE,
+        format=format,
+        num_keep=num_keep,
+        num_predict=num_predict,
+        stop=list(stop) if stop else None
+    )
@@ -1,11 +1,21 @@
+import atexit
 import logging
-from logging.handlers import RotatingFileHandler
+import queue
+from logging.handlers import QueueHandler, QueueListener, RotatingFileHandler
 from app.core.config import settings
 import os
 
-# Logger Formatter
+# The format uses none of these record fields, so skip collecting them:
+# thread/process lookups and the caller's frame walk (_srcfile = None)
+logging.logThreads = False
+logging.logProcesses = False
+logging.logMultiprocessing = False
+logging.logAsyncioTasks = False
+logging._srcfile = None
+
+# Logger Formatter (only the app logger uses these handlers, so its name is baked in)
 formatter = logging.Formatter(
-    fmt="%(asctime)s | %(levelname)s | %(name)s | %(message)s",
+    fmt=f"%(asctime)s | %(levelname)s | {settings.APP_NAME.replace('%', '%%')} | %(message)s",
     datefmt="%Y-%m-%d %H:%M:%S"
 )
 
@@ -15,10 +25,29 @@ console_handler.setFormatter(formatter)
 
 os.makedirs("logs", exist_ok=True)
 
+
+class SampledRotatingFileHandler(RotatingFileHandler):
+    """
+    RotatingFileHandler that checks the size only every CHECK_EVERY records.
+    The stock check re-formats the record and stats/seeks the file on each
+    emit; sampling lets a file overshoot maxBytes by at most CHECK_EVERY lines.
+    """
+
+    CHECK_EVERY = 128
+
+    _emitted = 0
+
+    def shouldRollover(self, record):
+        self._emitted += 1
+        if self._emitted % self.CHECK_EVERY:
+            return False
+        return super().shouldRollover(record)
+
+
 # File Handler (Rotating)
 # Prevents logs from growing forever
 # Keeps 3 backups, 5MB each
-file_handler = RotatingFileHandler(
+file_handler = SampledRotatingFileHandler(
     filename="logs/app.log",
     maxBytes=5 * 1024 * 1024,
     backupCount=3,
@@ -28,7 +57,13 @@ file_handler.setFormatter(formatter)
 # Logger Setup
 logger = logging.getLogger(settings.APP_NAME)
 logger.setLevel(settings.LOG_LEVEL.upper())
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+
+# Callers only enqueue records; a listener thread formats them and does the
+# console/file writes (including rotation), off the request path
+_log_queue = queue.SimpleQueue()
+logger.addHandler(QueueHandler(_log_queue))
+_listener = QueueListener(_log_queue, console_handler, file_handler, respect_handler_level=True)
+_listener.start()
+atexit.register(_listener.stop)  # drains the queue before exit
 
 logger.propagate = False  # Prevent double logging if root logger is used
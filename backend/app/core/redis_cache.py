@@ -0,0 +1,98 @@
+import asyncio
+import weakref
+from functools import lru_cache
+from typing import Optional
+from app.core.config import settings
+from app.core.logging import logger
+
+# Optional dependency handled gracefully
+try:
+    import redis
+    import redis.asyncio as aioredis
+except ImportError:
+    redis = None
+    aioredis = None
+
+# Second tier of the exact completion cache, shared by every uvicorn worker
+# and kept across restarts. Keys are the llm_cache digests; entries expire
+# after LLM_CACHE_TTL_SECONDS like the in-process LRU. Without REDIS_URL (or
+# the redis package) every lookup is a miss and every store a no-op.
+_PREFIX = "contentlens:llm:"
+
+# A slow or unreachable Redis must cost less than the LLM call it saves
+_TIMEOUT_SECONDS = 0.5
+
+# Async clients hold connections bound to the loop that opened them
+_async_clients: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, object]" = weakref.WeakKeyDictionary()
+
+
+def enabled() -> bool:
+    return bool(settings.REDIS_URL) and redis is not None
+
+
+def _options() -> dict:
+    return {
+        "decode_responses": True,
+        "socket_timeout": _TIMEOUT_SECONDS,
+        "socket_connect_timeout": _TIMEOUT_SECONDS,
+    }
+
+
+@lru_cache(maxsize=1)
+def _client():
+    return redis.Redis.from_url(settings.REDIS_URL, **_options())
+
+
+def _aclient():
+    loop = asyncio.get_running_loop()
+    client = _async_clients.get(loop)
+    if client is None:
+        client = _async_clients[loop] = aioredis.Redis.from_url(settings.REDIS_URL, **_options())
+    return client
+
+
+def get(key: str) -> Optional[str]:
+    """Shared completion for key, or None (also when Redis is unavailable)."""
+    if not enabled():
+        return None
+    try:
+        return _client().get(_PREFIX + key)
+    except redis.RedisError as e:
+        logger.warning(f"Redis cache: get failed: {e}")
+        return None
+
+
+def put(key: str, value: str) -> None:
+    if not enabled():
+        return
+    try:
+        _client().setex(_PREFIX + key, settings.LLM_CACHE_TTL_SECONDS, value)
+    except redis.RedisError as e:
+        logger.warning(f"Redis cache: set failed: {e}")
+
+
+async def aget(key: str) -> Optional[str]:
+    """Async counterpart of get()."""
+    if not enabled():
+        return None
+    try:
+        return await _aclient().get(_PREFIX + key)
+    except redis.RedisError as e:
+        logger.warning(f"Redis cache: get failed: {e}")
+        return None
+
+
+async def aput(key: str, value: str) -> None:
+    if not enabled():
+        return
+    try:
+        await _aclient().setex(_PREFIX + key, settings.LLM_CACHE_TTL_SECONDS, value)
+    except redis.RedisError as e:
+        logger.warning(f"Redis cache: set failed: {e}")
+
+
+async def close_redis_cache() -> None:
+    """Close the running loop's async client (called on shutdown)."""
+    client = _async_clients.pop(asyncio.get_running_loop(), None)
+    if client is not None:
+        await client.aclose()
@@ -0,0 +1,145 @@
+import json
+import os
+import threading
+from functools import lru_cache
+from typing import Dict, List, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import logger
+
+# Per-agent similarity thresholds. Judging must not reuse a score for a
+# merely similar output, while ideation tolerates looser paraphrases.
+# Extraction, summaries and translations stay on the exact tiers: briefs
+# differing only in budget, dates or names embed almost identically, and a
+# neighbour's output would carry the other document's facts.
+_THRESHOLDS: Dict[str, float] = {
+    "judgement": 0.97,
+    "ideation": 0.90,
+}
+
+
+@lru_cache(maxsize=1)
+def _load_backend():
+    """
+    Import faiss and the sentence encoder on first use only (torch is heavy).
+    Returns (faiss, encoder) or None when the optional packages are missing.
+    """
+    try:
+        import faiss
+        from sentence_transformers import SentenceTransformer
+    except ImportError:
+        logger.warning("Semantic cache: faiss / sentence-transformers not installed, cache disabled")
+        return None
+
+    logger.info(f"Semantic cache: loading encoder {settings.SEMANTIC_CACHE_MODEL}")
+    return faiss, SentenceTransformer(settings.SEMANTIC_CACHE_MODEL)
+
+
+class SemanticCache:
+    """
+    Nearest-neighbour cache of LLM outputs for one agent.
+    Inputs are embedded with a small sentence encoder (L2-normalized, so
+    inner product is cosine similarity) and searched in a flat FAISS index.
+    """
+
+    def __init__(self, namespace: str, threshold: float):
+        self.namespace = namespace
+        self.threshold = threshold
+        self._faiss, self._encoder = _load_backend()
+        self._index = None
+        self._outputs: List[str] = []
+        self._lock = threading.Lock()
+
+    def embed(self, text: str):
+        return self._encoder.encode([text], normalize_embeddings=True).astype("float32")
+
+    def lookup(self, text: str) -> Tuple[Optional[str], object]:
+        """Return (cached output or None, embedding of text)."""
+        vector = self.embed(text)
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return None, vector
+            scores, ids = self._index.search(vector, 1)
+            # Read under the lock: add() may start a new generation, after
+            # which the id would point into different outputs
+            output = self._outputs[ids[0, 0]] if scores[0, 0] >= self.threshold else None
+
+        if output is not None:
+            logger.info("Semantic cache: %s hit (similarity %.3f)", self.namespace, scores[0, 0])
+        return output, vector
+
+    def add(self, vector, output: str) -> None:
+        with self._lock:
+            if self._index is None or self._index.ntotal >= settings.SEMANTIC_CACHE_MAX_ENTRIES:
+                # Start a fresh generation instead of growing without bound
+                self._index = self._faiss.IndexFlatIP(vector.shape[1])
+                self._outputs = []
+            self._index.add(vector)
+            self._outputs.append(output)
+
+    def save(self, directory: str) -> None:
+        """Write the index and its outputs to <directory>/<namespace>.faiss/.json."""
+        with self._lock:
+            if self._index is None or self._index.ntotal == 0:
+                return
+            os.makedirs(directory, exist_ok=True)
+            base = os.path.join(directory, self.namespace)
+            self._faiss.write_index(self._index, f"{base}.faiss")
+            with open(f"{base}.json", "w", encoding="utf-8") as f:
+                json.dump(self._outputs, f)
+
+    def load(self, directory: str) -> None:
+        """Restore a previously saved index, if one exists and is consistent."""
+        base = os.path.join(directory, self.namespace)
+        if not (os.path.exists(f"{base}.faiss") and os.path.exists(f"{base}.json")):
+            return
+        try:
+            index = self._faiss.read_index(f"{base}.faiss")
+            with open(f"{base}.json", encoding="utf-8") as f:
+                outputs = json.load(f)
+        except Exception as e:
+            logger.warning(f"Semantic cache: could not load {self.namespace} index: {e}")
+            return
+        if index.ntotal != len(outputs):
+            logger.warning(f"Semantic cache: {self.namespace} index and outputs disagree, ignoring saved copy")
+            return
+        with self._lock:
+            self._index, self._outputs = index, outputs
+        logger.info(f"Semantic cache: restored {len(outputs)} {self.namespace} entries")
+
+
+_caches: Dict[str, SemanticCache] = {}
+_caches_lock = threading.Lock()
+
+
+def get_semantic_cache(namespace: str) -> Optional[SemanticCache]:
+    """Shared cache for an agent, or None when disabled or unavailable."""
+    if not settings.SEMANTIC_CACHE_ENABLED or _load_backend() is None:
+        return None
+
+    with _caches_lock:
+        if namespace not in _caches:
+            threshold = _THRESHOLDS.get(namespace, settings.SEMANTIC_CACHE_THRESHOLD)
+            cache = SemanticCache(namespace, threshold)
+            if settings.SEMANTIC_CACHE_DIR:
+                cache.load(settings.SEMANTIC_CACHE_DIR)
+            _caches[namespace] = cache
+        return _caches[namespace]
+
+
+def warm_semantic_cache() -> None:
+    """Load the encoder at process start instead of on the first request."""
+    if settings.SEMANTIC_CACHE_ENABLED:
+        _load_backend()
+
+
+def persist_semantic_caches() -> None:
+    """Save every cache to SEMANTIC_CACHE_DIR (called on shutdown)."""
+    if not settings.SEMANTIC_CACHE_DIR:
+        return
+    with _caches_lock:
+        caches = list(_caches.values())
+    for cache in caches:
+        try:
+            cache.save(settings.SEMANTIC_CACHE_DIR)
+        except Exception as e:
+            logger.warning(f"Semantic cache: could not save {cache.namespace} index: {e}")
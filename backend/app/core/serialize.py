@@ -0,0 +1,26 @@
+import json
+from typing import Any
+
+# Optional dependency handled gracefully
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+def compact(obj: Any) -> str:
+    """
+    Minimal JSON for interpolating payloads into prompts: no padding,
+    double quotes and null, so fewer tokens than str(dict).
+    Strings pass through unchanged.
+    """
+    if isinstance(obj, str):
+        return obj
+
+    if orjson is not None:
+        try:
+            return orjson.dumps(obj, default=str).decode()
+        except TypeError:
+            pass  # e.g. non-string dict keys; the stdlib handles those
+
+    return json.dumps(obj, separators=(",", ":"), ensure_ascii=False, default=str)
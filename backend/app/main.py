@@ -1,18 +1,43 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from .api.routes import router as api_router
 from fastapi.middleware.cors import CORSMiddleware
-from app.core.langfuse import init_langfuse
+from app.core.config import settings
+from app.core.langfuse import check_langfuse_auth, flush_langfuse, init_langfuse
+from app.core.http import close_http_client, init_http_client
+from app.core.redis_cache import close_redis_cache
+from app.core.semantic_cache import persist_semantic_caches, warm_semantic_cache
+from app.graphs.document_graph import create_graph
 
-init_langfuse()
-app = FastAPI(title="ContentLens AI - Backend")
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    init_langfuse()
+    # Runs in the background so a slow Langfuse API never delays startup
+    auth_check = asyncio.create_task(check_langfuse_auth())
+    warm_semantic_cache()
+    create_graph()
+    await init_http_client()
+    yield
+    auth_check.cancel()
+    await close_http_client()
+    await close_redis_cache()
+    persist_semantic_caches()
+    await flush_langfuse()
+
+
+app = FastAPI(title="ContentLens AI - Backend", lifespan=lifespan)
 
 # Add CORS middleware
+# Explicit origins, methods and headers: Starlette answers them from
+# precomputed sets instead of echoing each request's Origin back
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=[origin.strip() for origin in settings.CORS_ORIGINS.split(",") if origin.strip()],
     allow_credentials=True,
-    allow_methods=["*"],  # Allows all methods (GET, POST, etc.)
-    allow_headers=["*"],  # Allows all headers
+    allow_methods=["GET", "POST", "OPTIONS"],
+    allow_headers=["Content-Type", "Authorization"],
 )
 
 app.include_router(api_router, prefix="/api")
@@ -21,3 +46,9 @@ app.include_router(api_router, prefix="/api")
 @app.get("/")
 def root():
     return {"message": "ContentLens AI backend is running"}
+
+
+@app.get("/healthz")
+def healthz():
+    # Liveness only: never waits for an Ollama slot
+    return {"status": "ok"}
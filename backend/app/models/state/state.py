@@ -1,4 +1,24 @@
-from typing import TypedDict, List, Optional, Dict, Any
+import operator
+from typing import Annotated, TypedDict, List, Optional, Dict, Any, Set
+from ...core.logging import logger
+from ...core.serialize import compact
+
+
+def merge_evaluations(current: List[Dict[str, Any]], update: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """
+    Reducer for the evaluations channel: nodes return only their new items.
+    A scored item replaces the pending (deferred) item of the same agent_type.
+    """
+    merged = list(current or [])
+    for evaluation in update or []:
+        for i, existing in enumerate(merged):
+            if (existing.get("pending") and not evaluation.get("pending")
+                    and existing.get("agent_type") == evaluation.get("agent_type")):
+                merged[i] = evaluation
+                break
+        else:
+            merged.append(evaluation)
+    return merged
 
 
 class AgentMetadata(TypedDict, total=False):
@@ -6,7 +26,7 @@ class AgentMetadata(TypedDict, total=False):
     Per-agent metadata for observability and tracing.
     Allows tracking individual agent execution, performance, and state.
     """
-    agent_id: str  # Unique identifier (e.g., "analyze_1", "summarize_1")
+    agent_id: str  # Unique identifier (e.g., "analyze_3f9c0a1b2d4e")
     agent_name: str  # Canonical name (e.g., "analyze", "summarize")
     start_time: float  # Unix timestamp
     end_time: Optional[float]
@@ -40,13 +60,18 @@ class AgentState(TypedDict, total=False):
     user_request: str
     source_lang: str
     extraction: Optional[dict]
+    extraction_json: Optional[str]  # compact(extraction), serialized once by extraction_node
     trace_id: Optional[str]
     
     # Router decisions and execution control
     next_steps: Optional[List[str]]  # List of agent names to execute
-    current_step_index: Optional[int]  # For sequential fallback
+    current_step_index: Annotated[int, operator.add]  # Nodes return their increment (1)
+    defer_evaluation: Optional[bool]  # Agent nodes return unscored items for one batched Judge call
     pending_agents: List[str]  # Agents awaiting execution
+    speculative_tasks: Optional[Dict[str, Any]]  # asyncio tasks started before routing, by scheduled agent name
+    request_tasks: Optional[Set[Any]]  # every such task, owned (and cancelled on exit) by the workflow
     completed_agents: List[str]  # Successfully completed agents
+    agent_events: Optional[Any]  # asyncio.Queue receiving each AgentOutput as it finishes (streaming requests)
     
     # Agent outputs (keyed by agent name for parallel safety)
     # These are kept for backward compatibility
@@ -65,5 +90,25 @@ class AgentState(TypedDict, total=False):
     # Error and evaluation tracking
     errors: List[str]
     agent_errors: Dict[str, str]  # { "analyze": "error message", ... }
-    evaluations: List[Dict[str, Any]]  # Global evaluations
-    agent_evaluations: Dict[str, List[Dict[str, Any]]]  # Per-agent evaluations
\ No newline at end of file
+    evaluations: Annotated[List[Dict[str, Any]], merge_evaluations]  # Global evaluations (nodes return their delta)
+    agent_evaluations: Dict[str, List[Dict[str, Any]]]  # Per-agent evaluations
+
+
+def extraction_text(state: AgentState) -> str:
+    """
+    The extraction as compact JSON, reusing the copy extraction_node stored;
+    "" when nothing was extracted, so callers can fall back to the raw text.
+    """
+    if not state.get("extraction"):
+        return ""
+    text = state.get("extraction_json")
+    return text if text is not None else compact(state["extraction"])
+
+
+def skip_empty_input(text: str, output_key: str, agent_name: str) -> Optional[Dict[str, Any]]:
+    """The node's state update when text is blank, else None (run the agent)."""
+    if text.strip():
+        return None
+    # Nothing to work from; an LLM call would only produce filler
+    logger.warning(f"{agent_name} skipped: no input content")
+    return {output_key: None, "current_step_index": 1, "evaluations": []}
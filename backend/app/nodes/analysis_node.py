@@ -1,31 +1,27 @@
+import functools
 from ..core.logging import logger
-from ..models.state.state import AgentState
+from ..models.state.state import AgentState, extraction_text
 from ..agents.analyzer import AnalyzerAgent
-from ..utils.output_validator import OutputValidator
-from ..agents.judge import JudgeAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
 
-def analysis_node(state: AgentState):
+_agent = functools.cache(AnalyzerAgent)
+
+async def analysis_node(state: AgentState):
     logger.info("--- NODE: ANALYSIS ---")
-    agent = AnalyzerAgent()
-    analysis_result = agent.run(state["extraction"])
+    agent = _agent()
+    extraction = extraction_text(state)
+    analysis_result = await agent.arun(extraction)
     
     # Validate output
-    code_valid = OutputValidator.validate_agent_output('analysis', analysis_result)
-    if not code_valid:
-        logger.warning("Analysis output validation failed")
+    validate_in_background('analysis', analysis_result)
     
     # LLM Judge evaluation
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('analysis', str(state["extraction"]), analysis_result)
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
-    
-    # Increment step counter
-    current_index = state.get("current_step_index", 0)
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluation = await judge.aevaluate('analysis', extraction, analysis_result)
+
     return {
         "analysis": analysis_result,
-        "current_step_index": current_index + 1,
-        "evaluations": evaluations
+        "current_step_index": 1,
+        "evaluations": [evaluation]
     }
\ No newline at end of file
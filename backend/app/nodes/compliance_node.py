@@ -1,33 +1,32 @@
+import asyncio
+import functools
 from ..core.logging import logger
-from ..models.state.state import AgentState
+from ..models.state.state import AgentState, extraction_text
 from ..agents.compliance import ComplianceAgent
-from ..utils.output_validator import OutputValidator
-from ..agents.judge import JudgeAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
+from ..core.serialize import compact
 
+_agent = functools.cache(ComplianceAgent)
 
-def compliance_node(state: AgentState):
+
+async def compliance_node(state: AgentState):
     logger.info("--- NODE: COMPLIANCE ---")
-    agent = ComplianceAgent()
+    agent = _agent()
     # Check the copywriting first if present, else the summary or extraction
-    to_check = state.get("copywriting") or state.get("summary") or str(state.get("extraction", ""))
-    compliance_report = agent.run(to_check)
+    to_check = state.get("copywriting") or state.get("summary") or extraction_text(state)
+    # Rule scanning is CPU-bound; keep it off the event loop
+    compliance_report = await asyncio.to_thread(agent.run, to_check)
     
     # Validate output
-    code_valid = OutputValidator.validate_agent_output('compliance', compliance_report)
-    if not code_valid:
-        logger.warning("Compliance output validation failed")
+    validate_in_background('compliance', compliance_report)
     
     # LLM Judge evaluation
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('compliance', to_check, str(compliance_report))
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluation = await judge.aevaluate('compliance', to_check, compact(compliance_report))
 
-    current_index = state.get("current_step_index", 0)
     return {
         "compliance": compliance_report,
-        "current_step_index": current_index + 1,
-        "evaluations": evaluations
+        "current_step_index": 1,
+        "evaluations": [evaluation]
     }
@@ -1,33 +1,32 @@
+import functools
 from ..core.logging import logger
-from ..models.state.state import AgentState
+from ..models.state.state import AgentState, extraction_text, skip_empty_input
 from ..agents.copywriter import CopywriterAgent
-from ..utils.output_validator import OutputValidator
-from ..agents.judge import JudgeAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
 
-def copywriter_node(state: AgentState):
+_agent = functools.cache(CopywriterAgent)
+
+async def copywriter_node(state: AgentState):
     logger.info("--- NODE: COPYWRITER ---")
-    agent = CopywriterAgent()
+    agent = _agent()
     # Use the raw text as the brief for copywriting
-    brief = state.get("raw_text") or str(state.get("extraction", ""))
+    brief = state.get("raw_text") or extraction_text(state)
     user_request = state.get("user_request", "")
-    copy = agent.run(str(brief), user_request)
+    skipped = skip_empty_input(brief, "copywriting", "Copywriting")
+    if skipped:
+        return skipped
+    copy = await agent.arun(brief, user_request)
     
     # Validate output
-    code_valid = OutputValidator.validate_agent_output('copywriter', copy)
-    if not code_valid:
-        logger.warning("Copywriter output validation failed")
+    validate_in_background('copywriter', copy)
     
     # LLM Judge evaluation
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('copywriter', brief + " | " + user_request, copy)
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
-    
-    current_index = state.get("current_step_index", 0)
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluation = await judge.aevaluate('copywriter', brief + " | " + user_request, copy)
+
     return {
         "copywriting": copy,
-        "current_step_index": current_index + 1,
-        "evaluations": evaluations
+        "current_step_index": 1,
+        "evaluations": [evaluation]
     }
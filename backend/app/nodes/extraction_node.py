@@ -1,27 +1,28 @@
+import functools
 from ..core.logging import logger
 from ..models.state.state import AgentState
 from ..agents.extractor import ExtractorAgent
-from ..utils.output_validator import OutputValidator
-from ..agents.judge import JudgeAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
+from ..core.serialize import compact
 
+_agent = functools.cache(ExtractorAgent)
 
-def extraction_node(state: AgentState):
+
+async def extraction_node(state: AgentState):
     logger.info("--- NODE: EXTRACTION ---")
-    agent = ExtractorAgent()
+    agent = _agent()
     # The raw_text comes from the FileLoader in the workflow
-    result = agent.run(state["raw_text"])
+    result = await agent.arun(state["raw_text"])
     
     # Validate output
-    code_valid = OutputValidator.validate_agent_output('extraction', result)
-    if not code_valid:
-        logger.warning("Extraction output validation failed")
+    validate_in_background('extraction', result)
     
     # LLM Judge evaluation
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('extraction', state["raw_text"], str(result))
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
-    
-    return {"extraction": result, "evaluations": evaluations}
\ No newline at end of file
+    # Deferred items are scored in parallel_agents_node's batched call
+    judge = get_judge(state.get("defer_evaluation", False))
+    # Serialized once here; downstream prompts and judge contexts reuse it
+    extraction_json = compact(result)
+    evaluation = await judge.aevaluate('extraction', state["raw_text"], extraction_json)
+
+    return {"extraction": result, "extraction_json": extraction_json, "evaluations": [evaluation]}
\ No newline at end of file
@@ -1,31 +1,30 @@
+import functools
 from ..core.logging import logger
-from ..models.state.state import AgentState
+from ..models.state.state import AgentState, extraction_text, skip_empty_input
 from ..agents.ideation import IdeationAgent
-from ..utils.output_validator import OutputValidator
-from ..agents.judge import JudgeAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
+
+_agent = functools.cache(IdeationAgent)
  
-def ideation_node(state: AgentState):
+async def ideation_node(state: AgentState):
     logger.info("--- NODE: IDEATION ---")
-    agent = IdeationAgent()
-    input_content = state.get("extraction") or state.get("raw_text") or ""
-    ideas = agent.run(input_content)
+    agent = _agent()
+    input_content = extraction_text(state) or state.get("raw_text") or ""
+    skipped = skip_empty_input(input_content, "ideation", "Ideation")
+    if skipped:
+        return skipped
+    ideas = await agent.arun(input_content)
     
     # Validate output
-    code_valid = OutputValidator.validate_agent_output('ideation', ideas)
-    if not code_valid:
-        logger.warning("Ideation output validation failed")
+    validate_in_background('ideation', ideas)
     
     # LLM Judge evaluation
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('ideation', input_content, ideas)
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluation = await judge.aevaluate('ideation', input_content, ideas)
 
-    current_index = state.get("current_step_index", 0)
     return {
         "ideation": ideas,
-        "current_step_index": current_index + 1,
-        "evaluations": evaluations
+        "current_step_index": 1,
+        "evaluations": [evaluation]
     }
@@ -6,13 +6,17 @@ Each agent runs independently in its own async task with isolated tracing.
 """
 
 import asyncio
+import logging
+import secrets
 import time
 from typing import Dict, List, Any, Optional
-from datetime import datetime
 
 from ..models.state.state import AgentState, AgentMetadata, AgentOutput
+from ..core.config import settings
 from ..core.logging import logger
-from ..core.langfuse import get_langfuse_client
+from ..core.langfuse import get_sampled_langfuse_client
+from ..agents.judge import get_judge
+from ..agents.router import RouterAgent
 
 # Import all agent nodes
 from .analysis_node import analysis_node
@@ -22,9 +26,11 @@ from .compliance_node import compliance_node
 from .summarization_node import summarization_node
 from .translation_node import translation_node
 from .copywriter_node import copywriter_node
+from .summarize_translate_node import summarize_translate_node
 
 
-# Mapping of agent names to their node functions
+# Mapping of agent names to their node functions (all async def; nothing
+# runs in the default thread pool)
 AGENT_NODE_MAP = {
     "analyze": analysis_node,
     "recommend": recommendation_node,
@@ -33,8 +39,31 @@ AGENT_NODE_MAP = {
     "summarize": summarization_node,
     "translate": translation_node,
     "copywrite": copywriter_node,
+    "summarize_translate": summarize_translate_node,
 }
 
+# Fused nodes and the agents each one serves in a single LLM call; their
+# results are split back into one AgentOutput per agent
+FUSED_AGENTS = {
+    "summarize_translate": ("summarize", "translate"),
+}
+
+# State field each agent node writes its result to (the legacy output fields)
+AGENT_OUTPUT_FIELD = {
+    "analyze": "analysis",
+    "recommend": "recommendation",
+    "ideate": "ideation",
+    "compliance": "compliance",
+    "summarize": "summary",
+    "translate": "translation",
+    "copywrite": "copywriting",
+}
+
+# Every task the router can return must have a node and an output field
+_UNMAPPED = set(RouterAgent.VALID_STEPS) - (set(AGENT_NODE_MAP) & set(AGENT_OUTPUT_FIELD))
+if _UNMAPPED:
+    raise RuntimeError(f"Router tasks without an agent node: {sorted(_UNMAPPED)}")
+
 
 async def execute_agent_with_tracing(
     agent_name: str,
@@ -54,7 +83,10 @@ async def execute_agent_with_tracing(
     Returns:
         AgentOutput with metadata and result
     """
-    agent_id = f"{agent_name}_{int(time.time() * 1000)}"
+    # Random suffix: agents started in the same millisecond must not share an id
+    agent_id = f"{agent_name}_{secrets.token_hex(6)}"
+    # Durations come from the monotonic clock; the timestamps are wall-clock
+    started_ns = time.perf_counter_ns()
     
     # Initialize metadata
     metadata: AgentMetadata = {
@@ -98,33 +130,22 @@ async def execute_agent_with_tracing(
             logger.warning(f"[{agent_id}] Failed to create Langfuse span: {trace_error}")
     
     try:
-        logger.info(f"🚀 [{agent_id}] Starting {agent_name} agent execution (parallel)")
+        logger.info("🚀 [%s] Starting %s agent execution (parallel)", agent_id, agent_name)
         
-        # Get the agent node function
-        agent_func = AGENT_NODE_MAP.get(agent_name)
-        if not agent_func:
-            raise ValueError(f"Unknown agent: {agent_name}")
-        
-        # Execute agent (convert sync to async if needed)
-        # Most LangGraph nodes are sync, so we wrap in executor
-        loop = asyncio.get_event_loop()
-        agent_result = await loop.run_in_executor(
-            None, 
-            agent_func, 
-            state
-        )
+        # Every agent node is a coroutine; they all share the event loop.
+        # The router can only pick mapped agents (checked at import); an
+        # unknown preset step fails here like any other agent error
+        agent_result = await AGENT_NODE_MAP[agent_name](state)
         
         # Record metadata
         end_time = time.time()
-        duration_ms = (end_time - metadata["start_time"]) * 1000
+        duration_ms = (time.perf_counter_ns() - started_ns) / 1e6
         
         metadata["end_time"] = end_time
         metadata["duration_ms"] = duration_ms
         metadata["status"] = "completed"
         
-        logger.info(
-            f"✅ [{agent_id}] {agent_name} completed in {duration_ms:.2f}ms"
-        )
+        logger.info("✅ [%s] %s completed in %.2fms", agent_id, agent_name, duration_ms)
         
         # Update Langfuse span
         if span:
@@ -138,9 +159,12 @@ async def execute_agent_with_tracing(
                 logger.warning(f"[{agent_id}] Failed to update Langfuse span: {trace_error}")
         
         # Extract the actual output for this agent from result
-        # The node returns a dict with the agent's output key
-        agent_output_key = agent_name  # e.g., "analysis", "recommendation"
-        output_value = agent_result.get(agent_output_key, agent_result)
+        # The node returns a dict keyed by its state field (e.g. "analysis");
+        # fused nodes keep the whole update for _split_fused()
+        if agent_name in FUSED_AGENTS:
+            output_value = agent_result
+        else:
+            output_value = agent_result.get(AGENT_OUTPUT_FIELD[agent_name])
         
         # Get evaluation if present
         evaluation = None
@@ -159,7 +183,7 @@ async def execute_agent_with_tracing(
         
     except Exception as error:
         end_time = time.time()
-        duration_ms = (end_time - metadata["start_time"]) * 1000
+        duration_ms = (time.perf_counter_ns() - started_ns) / 1e6
         error_msg = f"{type(error).__name__}: {str(error)}"
         
         metadata["end_time"] = end_time
@@ -194,6 +218,88 @@ async def execute_agent_with_tracing(
         )
 
 
+def _fuse(agents_to_run: List[str], state: AgentState) -> List[str]:
+    """Schedule a fused node in place of every agent group it serves."""
+    # Arabic sources skip translation, so fusing would gain nothing
+    if not settings.FUSE_SUMMARIZE_TRANSLATE or state.get("source_lang") == "ar":
+        return list(agents_to_run)
+    scheduled = list(agents_to_run)
+    for fused, parts in FUSED_AGENTS.items():
+        if all(part in scheduled for part in parts):
+            scheduled = [agent for agent in scheduled if agent not in parts] + [fused]
+    return scheduled
+
+
+# Agents that read only the extraction or raw text, never the refined
+# user_request, so their output cannot change once routing finishes
+SPECULATIVE_AGENTS = frozenset({"summarize", "translate", "analyze", "ideate", "compliance", "summarize_translate"})
+
+
+def start_speculative_agents(state: AgentState, guess: List[str]) -> Dict[str, asyncio.Task]:
+    """
+    Start the guessed agents that qualify for speculation, keyed by the name
+    they are scheduled under. parallel_agents_node adopts the tasks the
+    router confirms and cancels the rest; run_document_workflow cancels any
+    left over when the graph fails first.
+    """
+    agent_state = {**state, "defer_evaluation": True}
+    trace_client = get_sampled_langfuse_client()
+    speculative = {
+        agent_name: asyncio.create_task(execute_agent_with_tracing(agent_name, agent_state, trace_client))
+        for agent_name in _fuse(guess, state)
+        if agent_name in SPECULATIVE_AGENTS
+    }
+    # Registered with the workflow too: if a node fails before the fan-out,
+    # the state holding them is lost but the workflow still cancels them
+    owned = state.get("request_tasks")
+    if owned is not None:
+        owned.update(speculative.values())
+    return speculative
+
+
+def _cancel(speculative: Dict[str, asyncio.Task]) -> None:
+    for agent_name, task in speculative.items():
+        if task.cancel():
+            logger.info("Speculative %s cancelled: not selected by the router", agent_name)
+
+
+def _split_fused(agent_output) -> List[AgentOutput]:
+    """One AgentOutput per agent a fused node served (others pass through)."""
+    if isinstance(agent_output, Exception) or agent_output["agent_name"] not in FUSED_AGENTS:
+        return [agent_output]
+    parts = FUSED_AGENTS[agent_output["agent_name"]]
+    result = agent_output["output"] or {}
+    evaluations = result.get("evaluations") or [None] * len(parts)
+    return [
+        AgentOutput(
+            agent_id=agent_output["agent_id"],
+            agent_name=part,
+            output=result.get(AGENT_OUTPUT_FIELD[part]),
+            metadata={**agent_output["metadata"], "agent_name": part},
+            evaluation=evaluation,
+            validation_passed=agent_output["validation_passed"],
+        )
+        for part, evaluation in zip(parts, evaluations)
+    ]
+
+
+async def _announced(agent_task, events: asyncio.Queue):
+    """Await one agent and put its AgentOutput(s) on the request's event queue."""
+    result = await agent_task
+    for agent_output in _split_fused(result):
+        events.put_nowait(agent_output)
+    return result
+
+
+def _is_pending(evaluation: Optional[Dict[str, Any]]) -> bool:
+    return bool((evaluation or {}).get("pending"))
+
+
+def _upstream_pending(state: AgentState) -> List[Dict[str, Any]]:
+    """Items the nodes before the fan-out deferred; their scores replace them in the channel."""
+    return [evaluation for evaluation in state.get("evaluations") or [] if _is_pending(evaluation)]
+
+
 async def parallel_agents_node(state: AgentState) -> AgentState:
     """
     Execute selected agents in parallel while preserving observability.
@@ -212,18 +318,22 @@ async def parallel_agents_node(state: AgentState) -> AgentState:
     Returns:
         Updated AgentState with agent_outputs and agent_metadata populated
     """
-    agents_to_run = state.get("next_steps", [])
+    # Unset graph channels read as None, hence the `or` defaults below
+    agents_to_run = state.get("next_steps") or []
+    speculative = dict(state.get("speculative_tasks") or {})
     
     if not agents_to_run:
+        _cancel(speculative)
         logger.info("⏭️  parallel_agents_node: No agents to execute, passing through")
-        return state
+        pending = _upstream_pending(state)
+        return {"evaluations": await get_judge().aevaluate_batch(pending) if pending else []}
     
     logger.info(
-        f"🚀 parallel_agents_node: Starting parallel execution for {len(agents_to_run)} agents: {agents_to_run}"
+        "🚀 parallel_agents_node: Starting parallel execution for %d agents: %s", len(agents_to_run), agents_to_run
     )
     
-    start_time = time.time()
-    trace_client = get_langfuse_client()
+    start_time = time.perf_counter()
+    trace_client = get_sampled_langfuse_client()
     
     # Create parallel execution span in Langfuse
     parallel_span = None
@@ -248,10 +358,22 @@ async def parallel_agents_node(state: AgentState) -> AgentState:
     try:
         # Create async tasks for all agents
         # Pass parent_observation to create trace hierarchy
+        # Agents judge lazily: each returns its output unscored so all
+        # outputs are scored in one call below
+        # Agents already started speculatively are awaited, not re-run
+        agent_state = {**state, "defer_evaluation": True}
         tasks = [
-            execute_agent_with_tracing(agent_name, state, trace_client, parallel_span)
-            for agent_name in agents_to_run
+            speculative.pop(agent_name)
+            if agent_name in speculative
+            else execute_agent_with_tracing(agent_name, agent_state, trace_client, parallel_span)
+            for agent_name in _fuse(agents_to_run, state)
         ]
+        _cancel(speculative)
+
+        # Streaming requests see each output as soon as its agent finishes
+        events = state.get("agent_events")
+        if events is not None:
+            tasks = [_announced(task, events) for task in tasks]
         
         # Execute all agents concurrently
         # return_exceptions=True ensures one failure doesn't stop others
@@ -259,6 +381,25 @@ async def parallel_agents_node(state: AgentState) -> AgentState:
             *tasks,
             return_exceptions=True
         )
+        agent_outputs_list = [
+            agent_output for result in agent_outputs_list for agent_output in _split_fused(result)
+        ]
+
+        # Batched LLM Judge evaluation: the agents' outputs plus anything the
+        # upstream nodes (extraction, refinement) deferred, in one call
+        upstream = _upstream_pending(state)
+        pending = [
+            agent_output for agent_output in agent_outputs_list
+            if not isinstance(agent_output, Exception)
+            and _is_pending(agent_output.get("evaluation"))
+        ]
+        if upstream or pending:
+            scored = await get_judge().aevaluate_batch(
+                upstream + [agent_output["evaluation"] for agent_output in pending]
+            )
+            upstream = scored[:len(upstream)]
+            for agent_output, evaluation in zip(pending, scored[len(upstream):]):
+                agent_output["evaluation"] = evaluation
         
         # Process results
         agent_outputs: Dict[str, AgentOutput] = {}
@@ -293,29 +434,17 @@ async def parallel_agents_node(state: AgentState) -> AgentState:
                 logger.warning(f"Agent {agent_name} failed: {error_msg}")
             else:
                 # For backward compatibility, also update legacy field names
-                if agent_name == "analyze":
-                    legacy_updates["analysis"] = agent_output["output"]
-                elif agent_name == "recommend":
-                    legacy_updates["recommendation"] = agent_output["output"]
-                elif agent_name == "ideate":
-                    legacy_updates["ideation"] = agent_output["output"]
-                elif agent_name == "summarize":
-                    legacy_updates["summary"] = agent_output["output"]
-                elif agent_name == "translate":
-                    legacy_updates["translation"] = agent_output["output"]
-                elif agent_name == "copywrite":
-                    legacy_updates["copywriting"] = agent_output["output"]
-                elif agent_name == "compliance":
-                    legacy_updates["compliance"] = agent_output["output"]
+                legacy_updates[AGENT_OUTPUT_FIELD[agent_name]] = agent_output["output"]
         
-        elapsed = time.time() - start_time
+        elapsed = time.perf_counter() - start_time
         
-        logger.info(
-            f"✅ Parallel execution completed: "
-            f"{len(agents_to_run)} agents in {elapsed:.2f}s, "
-            f"successes: {len([a for a in agent_outputs.values() if a['metadata']['status'] == 'completed'])}, "
-            f"failures: {len(agent_errors)}"
-        )
+        if logger.isEnabledFor(logging.INFO):
+            logger.info(
+                "✅ Parallel execution completed: %d agents in %.2fs, successes: %d, failures: %d",
+                len(agents_to_run), elapsed,
+                sum(1 for a in agent_outputs.values() if a["metadata"]["status"] == "completed"),
+                len(agent_errors),
+            )
         
         # Update Langfuse span
         if parallel_span:
@@ -336,18 +465,22 @@ async def parallel_agents_node(state: AgentState) -> AgentState:
             except Exception as trace_error:
                 logger.warning(f"Failed to update Langfuse parallel span: {trace_error}")
         
-        # Merge results into state
-        updated_state = state.copy()
+        # Return only the updated channels (evaluations is a reducer channel,
+        # so re-sending the whole list would duplicate it)
+        updated_state: AgentState = {}
         updated_state["agent_outputs"] = agent_outputs
         updated_state["agent_metadata"] = agent_metadata
         updated_state["agent_errors"] = agent_errors
         updated_state["agent_evaluations"] = agent_evaluations
+        updated_state["evaluations"] = upstream + [
+            evaluation for evaluations in agent_evaluations.values() for evaluation in evaluations
+        ]
         
         # Update legacy fields for backward compatibility
         updated_state.update(legacy_updates)
         
         # Add all completed agents to completed_agents list
-        completed = state.get("completed_agents", [])
+        completed = list(state.get("completed_agents") or [])
         completed.extend([
             name for name, output in agent_outputs.items()
             if output["metadata"]["status"] == "completed"
@@ -372,8 +505,6 @@ async def parallel_agents_node(state: AgentState) -> AgentState:
             except Exception as trace_error:
                 logger.warning(f"Failed to update Langfuse span on error: {trace_error}")
         
-        # Return state with error recorded
-        updated_state = state.copy()
+        # Return the error recorded
         error_msg = f"Parallel execution failed: {error}"
-        updated_state["errors"] = state.get("errors", []) + [error_msg]
-        return updated_state
+        return {"errors": (state.get("errors") or []) + [error_msg]}
@@ -1,34 +1,34 @@
+import functools
 from ..core.logging import logger
-from ..models.state.state import AgentState
+from ..models.state.state import AgentState, extraction_text, skip_empty_input
 from ..agents.recommender import RecommenderAgent
-from ..utils.output_validator import OutputValidator
-from ..agents.judge import JudgeAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
+from ..core.serialize import compact
 
+_agent = functools.cache(RecommenderAgent)
 
-def recommendation_node(state: AgentState):
+
+async def recommendation_node(state: AgentState):
     logger.info("--- NODE: RECOMMENDATION ---")
-    agent = RecommenderAgent()
-    input_content = state.get("raw_text") or state.get("extraction") or state.get("analysis") or ""
+    agent = _agent()
+    # A string throughout: the judge context below concatenates it
+    input_content = state.get("raw_text") or extraction_text(state) or compact(state.get("analysis") or "")
     user_request = state.get("user_request", "")
-    recommendations = agent.run(input_content, user_request)
+    skipped = skip_empty_input(input_content, "recommendation", "Recommendation")
+    if skipped:
+        return skipped
+    recommendations = await agent.arun(input_content, user_request)
     
     # Validate output
-    code_valid = OutputValidator.validate_agent_output('recommendation', recommendations)
-    if not code_valid:
-        logger.warning("Recommendation output validation failed")
+    validate_in_background('recommendation', recommendations)
     
     # LLM Judge evaluation
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('recommendation', input_content + " | " + user_request, recommendations)
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
-    
-    # Increment step counter
-    current_index = state.get("current_step_index", 0)
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluation = await judge.aevaluate('recommendation', input_content + " | " + user_request, recommendations)
+
     return {
         "recommendation": recommendations,
-        "current_step_index": current_index + 1,
-        "evaluations": evaluations
+        "current_step_index": 1,
+        "evaluations": [evaluation]
     }
\ No newline at end of file
@@ -1,19 +1,33 @@
+import functools
+from ..core.config import settings
 from ..core.logging import logger
-from ..models.state.state import AgentState
+from ..models.state.state import AgentState, extraction_text
 from ..agents.refiner import RefinerAgent
-from ..agents.judge import JudgeAgent
+from ..agents.router import RouterAgent
+from ..agents.judge import get_judge
+from .parallel_agents_node import start_speculative_agents
 
-def refiner_node(state: AgentState):
+_agent = functools.cache(RefinerAgent)
+_router = functools.cache(RouterAgent)
+
+async def refiner_node(state: AgentState):
     logger.info("--- NODE: REFINEMENT ---")
-    agent = RefinerAgent()
-    refined_request = agent.run(state["extraction"], state["user_request"])
+    agent = _agent()
+    extraction, user_request = state["extraction"], state["user_request"]
+
+    # Agents that do not read the request can start on the keyword guess for
+    # the original request while it is refined and routed
+    speculative = {}
+    if settings.SPECULATIVE_AGENTS_ENABLED and not state.get("next_steps"):
+        speculative = start_speculative_agents(state, _router().guess(user_request))
+        if speculative:
+            logger.info("Speculatively started %s", list(speculative))
+
+    refined_request = await agent.arun(extraction, user_request)
     
     # LLM Judge evaluation for refinement
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('refinement', str(state["extraction"]) + " | " + state["user_request"], refined_request)
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
-    
-    return {"user_request": refined_request, "evaluations": evaluations}
\ No newline at end of file
+    # Deferred items are scored in parallel_agents_node's batched call
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluation = await judge.aevaluate('refinement', extraction_text(state) + " | " + user_request, refined_request)
+
+    return {"user_request": refined_request, "evaluations": [evaluation], "speculative_tasks": speculative}
\ No newline at end of file
@@ -1,32 +1,27 @@
+import functools
 from ..core.logging import logger
-from ..models.state.state import AgentState
+from ..models.state.state import AgentState, extraction_text
 from ..agents.summarizer import SummarizerAgent
-from ..utils.output_validator import OutputValidator
-from ..agents.judge import JudgeAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
 
-def summarization_node(state: AgentState):
+_agent = functools.cache(SummarizerAgent)
+
+async def summarization_node(state: AgentState):
     logger.info("--- NODE: SUMMARIZATION ---")
-    agent = SummarizerAgent()
-    summary = agent.run(state["extraction"])
+    agent = _agent()
+    summary = await agent.arun(state["extraction"])
     
     # Validate output
-    code_valid = OutputValidator.validate_agent_output('summary', summary)
-    if not code_valid:
-        logger.warning("Summary output validation failed")
+    validate_in_background('summary', summary)
     
     # LLM Judge evaluation
-    judge = JudgeAgent()
-    evaluation = judge.evaluate('summary', str(state["extraction"]), summary)
-    
-    # Add evaluation to list
-    evaluations = state.get("evaluations", [])
-    evaluations.append(evaluation)
-    
-    # Increment step counter
-    current_index = state.get("current_step_index", 0)
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluation = await judge.aevaluate('summary', extraction_text(state), summary)
+
     return {
         "summary": summary,
-        "current_step_index": current_index + 1,
-        "evaluations": evaluations
+        "current_step_index": 1,
+        "evaluations": [evaluation]
     }
 
@@ -0,0 +1,72 @@
+import asyncio
+import functools
+from ..core.logging import logger
+from ..models.state.state import AgentState, extraction_text
+from ..agents.fused import SummarizeTranslateAgent
+from ..agents.summarizer import SummarizerAgent
+from ..agents.translator import TranslatorAgent
+from ..utils.output_validator import validate_in_background
+from ..agents.judge import get_judge
+
+_agent = functools.cache(SummarizeTranslateAgent)
+_summarizer = functools.cache(SummarizerAgent)
+_translator = functools.cache(TranslatorAgent)
+
+
+async def _pipelined(state: AgentState):
+    """
+    Summary and translation from the two separate agents, overlapped: the
+    summary is streamed and each finished section (the summary format
+    separates them with blank lines) is translated while the rest is
+    still being generated.
+    """
+    source_lang = state.get("source_lang")
+    summary, pending, translations = "", "", []
+    try:
+        async for chunk in _summarizer().astream(state["extraction"]):
+            summary += chunk
+            pending += chunk
+            while "\n\n" in pending:
+                section, pending = pending.split("\n\n", 1)
+                if section.strip():
+                    translations.append(asyncio.create_task(_translator().arun(section, source_lang)))
+        if pending.strip():
+            translations.append(asyncio.create_task(_translator().arun(pending, source_lang)))
+    except BaseException:
+        for task in translations:
+            task.cancel()
+        raise
+    return summary, "\n\n".join(await asyncio.gather(*translations))
+
+
+async def summarize_translate_node(state: AgentState):
+    logger.info("--- NODE: SUMMARIZATION + TRANSLATION ---")
+    agent = _agent()
+    try:
+        result = await agent.arun(state["extraction"])
+        summary, translation = result["summary"], result["translation"]
+    except Exception as e:
+        logger.warning(f"Fused summarize+translate failed, running the agents separately: {e}")
+        try:
+            summary, translation = await _pipelined(state)
+        except Exception as e:
+            logger.error(f"Summarizer Error: {e}")
+            summary, translation = "Summarization failed.", f"Translation failed: {str(e)}"
+
+    # Validate output
+    validate_in_background('summary', summary)
+    validate_in_background('translation', translation)
+
+    # LLM Judge evaluation, one item per fused agent
+    judge = get_judge(state.get("defer_evaluation", False))
+    evaluations = await asyncio.gather(
+        judge.aevaluate('summary', extraction_text(state), summary),
+        judge.aevaluate('translation', summary, translation),
+    )
+
+    return {
+        "summary": summary,
+        "translation": translation,
+        "current_step_index": 2,
+        "evaluations": list(evaluations)
+    }
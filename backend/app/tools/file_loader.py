@@ -1,4 +1,6 @@
+from io import BytesIO
 from pathlib import Path
+from typing import BinaryIO, Optional
 from app.core.config import settings
 from app.core.logging import logger
 from .ocr import perform_ocr
@@ -25,12 +27,15 @@ class FileLoader:
 
     SUPPORTED_EXTENSIONS = settings.ALLOWED_EXTENSIONS.split(",")
 
-    def __init__(self, file_path: str):
+    def __init__(self, file_path: str, data: Optional[bytes] = None):
+        # With data (e.g. an upload already in memory) nothing is read from
+        # disk and file_path only names the file (extension, logs)
         self.file_path = Path(file_path)
+        self.data = data
         self.validate_file()
 
     def validate_file(self):
-        if not self.file_path.exists():
+        if self.data is None and not self.file_path.exists():
             logger.error(f"File not found: {self.file_path}")
             raise FileNotFoundError(f"File not found: {self.file_path}")
 
@@ -45,7 +50,8 @@ class FileLoader:
             )
 
         # Size check
-        if self.file_path.stat().st_size > settings.MAX_FILE_SIZE_MB * 1024 * 1024:
+        size = len(self.data) if self.data is not None else self.file_path.stat().st_size
+        if size > settings.MAX_FILE_SIZE_MB * 1024 * 1024:
             logger.error(f"File too large: {self.file_path}")
             raise ValueError(f"File exceeds max size of {settings.MAX_FILE_SIZE_MB} MB")
 
@@ -81,17 +87,23 @@ class FileLoader:
                 f"Failed to process file: {str(e)}"
             ) from e
 
+    def _open(self) -> BinaryIO:
+        """Binary stream over the in-memory data or the file on disk."""
+        if self.data is not None:
+            return BytesIO(self.data)
+        return open(self.file_path, "rb")
+
     def _load_txt(self) -> str:
         logger.info(f"Loading TXT file: {self.file_path}")
-        with open(self.file_path, "r", encoding="utf-8") as f:
-            return f.read()
+        with self._open() as f:
+            return f.read().decode("utf-8")
 
     def _load_pdf(self) -> str:
         if not PyPDF2:
             raise ImportError("PyPDF2 is required to load PDF files")
         logger.info(f"Loading PDF file: {self.file_path}")
         text = ""
-        with open(self.file_path, "rb") as f:
+        with self._open() as f:
             reader = PyPDF2.PdfReader(f)
             for page in reader.pages:
                 text += page.extract_text() or ""
@@ -101,10 +113,12 @@ class FileLoader:
         if not docx:
             raise ImportError("python-docx is required to load DOCX files")
         logger.info(f"Loading DOCX file: {self.file_path}")
-        document = docx.Document(self.file_path)
+        with self._open() as f:
+            document = docx.Document(f)
         return "\n".join([para.text for para in document.paragraphs])
 
     def _load_image(self) -> str:
         # Delegate to specialized OCR tool
         logger.info(f"Handoff: Sending image to OCR tool: {self.file_path}")
-        return perform_ocr(str(self.file_path))
\ No newline at end of file
+        with self._open() as f:
+            return perform_ocr(f)
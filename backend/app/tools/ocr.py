@@ -1,14 +1,17 @@
+from typing import BinaryIO, Union
 import pytesseract
 from PIL import Image
 from ..core.logging import logger
 
-def perform_ocr(file_path: str) -> str:
+def perform_ocr(source: Union[str, BinaryIO]) -> str:
     """
     Stand-alone OCR tool to extract text from images.
+    Accepts a file path or an open binary stream.
     """
     try:
-        logger.info(f"Tool: Starting OCR for {file_path}")
-        img = Image.open(file_path)
+        name = source if isinstance(source, str) else "in-memory image"
+        logger.info(f"Tool: Starting OCR for {name}")
+        img = Image.open(source)
         # We can add custom config here for better Arabic/English detection
         text = pytesseract.image_to_string(img)
         return text
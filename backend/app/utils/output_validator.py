@@ -3,6 +3,7 @@ Output validation utilities for agent responses.
 Ensures outputs meet expected formats and quality standards.
 """
 
+import asyncio
 import re
 from typing import Dict, Any, List
 from ..core.logging import logger
@@ -115,6 +116,13 @@ class OutputValidator:
         # Basic check for Arabic characters
         return bool(re.search(r'[\u0600-\u06FF]', output))
 
+    @classmethod
+    def validate_summary_translation(cls, output: Any) -> bool:
+        """Validate the fused summarizer+translator answer."""
+        if not isinstance(output, dict):
+            return False
+        return cls.validate_summary(output.get("summary")) and cls.validate_translation(output.get("translation"))
+
     @staticmethod
     def validate_compliance(output: Any) -> bool:
         """Validate ComplianceAgent output used by compliance_node."""
@@ -184,6 +192,7 @@ class OutputValidator:
             'ideation': cls.validate_ideation,
             'copywriter': cls.validate_copywriter,
             'translation': cls.validate_translation,
+            'summary_translation': cls.validate_summary_translation,
             'compliance': cls.validate_compliance,
         }
 
@@ -199,4 +208,18 @@ class OutputValidator:
             return is_valid
         except Exception as e:
             logger.error(f"Validation error for {agent_name}: {e}")
-            return False
\ No newline at end of file
+            return False
+
+
+def validate_in_background(agent_name: str, output: Any) -> None:
+    """
+    Schedule validate_agent_output() to run after the calling node returns.
+    Its only effect is a logged warning, so it need not delay the next step;
+    outside an event loop it simply runs inline.
+    """
+    try:
+        loop = asyncio.get_running_loop()
+    except RuntimeError:
+        OutputValidator.validate_agent_output(agent_name, output)
+        return
+    loop.call_soon(OutputValidator.validate_agent_output, agent_name, output)
@@ -1,11 +1,12 @@
 from ..tools.file_loader import FileLoader
-from ..graphs.document_graph import app_graph
+from ..graphs.document_graph import create_graph
 from ..core.logging import logger
 from ..tools.language import detect_language
 from ..tools.validators import BriefValidator
 from ..core.langfuse import get_langfuse_callback, get_langfuse_tracer
 from langfuse import propagate_attributes
-from typing import Any, Dict
+from typing import Any, AsyncIterator, Dict, Optional, Set
+import asyncio
 
 
 def _extract_agent_output(value: Any) -> str:
@@ -67,7 +68,8 @@ def _clean_response_state(state: Dict[str, Any]) -> Dict[str, Any]:
     # Remove internal structures that shouldn't be in API response
     internal_fields = [
         "agent_outputs", "agent_metadata", "agent_errors", 
-        "agent_evaluations", "pending_agents"
+        "agent_evaluations", "pending_agents", "extraction_json",
+        "speculative_tasks", "agent_events", "request_tasks"
     ]
     for field in internal_fields:
         cleaned.pop(field, None)
@@ -75,9 +77,28 @@ def _clean_response_state(state: Dict[str, Any]) -> Dict[str, Any]:
     return cleaned
 
 
-async def run_document_workflow(file_path: str, user_request: str):
+async def _invoke_graph(initial_state: Dict[str, Any], config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run the graph, owning every task a node starts for the request: any
+    still running once the graph returns or raises (speculative agents
+    when routing fails, say) is cancelled instead of holding Ollama slots.
+    """
+    request_tasks: Set[asyncio.Task] = set()
+    try:
+        return await create_graph().ainvoke({**initial_state, "request_tasks": request_tasks}, config=config)
+    finally:
+        cancelled = sum(task.cancel() for task in request_tasks)
+        if cancelled:
+            logger.warning(f"Workflow: cancelled {cancelled} speculative agent(s) the graph left running")
+
+
+async def run_document_workflow(file_bytes: bytes, filename: str, user_request: str,
+                                events: Optional[asyncio.Queue] = None):
     """
     Orchestrates the pre-processing and execution of the AI Graph.
+    The upload is processed from memory; nothing is written to disk.
+    With events, each agent's AgentOutput is also put on that queue as
+    soon as the agent finishes (see stream_document_workflow).
     """
     tracer = get_langfuse_tracer()
     
@@ -86,8 +107,8 @@ async def run_document_workflow(file_path: str, user_request: str):
         with tracer.client.start_as_current_observation(
             as_type="span",
             name="document_processing_workflow",
-            input={"file_path": file_path, "user_request": user_request},
-            metadata={"file_path": file_path}
+            input={"filename": filename, "user_request": user_request},
+            metadata={"filename": filename, "file_size": len(file_bytes)}
         ) as trace:
 
             try:
@@ -95,16 +116,16 @@ async def run_document_workflow(file_path: str, user_request: str):
                 with trace.start_as_current_observation(
                     as_type="span",
                     name="file_loading",
-                    input={"file_path": file_path}
+                    input={"filename": filename}
                 ) as load_span:
-                    loader = FileLoader(file_path)
+                    loader = FileLoader(filename, data=file_bytes)
                     extracted_text = loader.load()
                     load_span.update(output={
                         "text_length": len(extracted_text) if extracted_text else 0,
                         "text": extracted_text if extracted_text else ""})
                 
                 if not extracted_text:
-                    logger.error(f"Workflow failed: No text extracted from {file_path}")
+                    logger.error(f"Workflow failed: No text extracted from {filename}")
                     trace.score(name="workflow_success", value=0.0, comment="No text extracted", data_type="NUMERIC")
                     # Set trace output even on error
                     trace.update_trace(output={"error": "No text could be extracted from the file."})
@@ -119,7 +140,7 @@ async def run_document_workflow(file_path: str, user_request: str):
                     clean_text = BriefValidator.sanitize_text(extracted_text)
 
                     if not BriefValidator.is_valid_brief(clean_text):
-                        logger.warning(f"Quality Check: File at {file_path} has low brief-keyword density.")
+                        logger.warning(f"Quality Check: File {filename} has low brief-keyword density.")
                         validate_span.update(
                             output={"clean_text_length": len(clean_text)},
                             metadata={"quality_check": "low_density"}
@@ -142,8 +163,15 @@ async def run_document_workflow(file_path: str, user_request: str):
                     "raw_text": clean_text,
                     "user_request": user_request,
                     "source_lang": source_lang,
-                    "errors": []
+                    "errors": [],
+                    # Graph channels start as None; nodes append to this list
+                    "evaluations": [],
+                    # Every node leaves its judgement pending; they are all
+                    # scored with one batched Judge call after the fan-out
+                    "defer_evaluation": True
                 }
+                if events is not None:
+                    initial_state["agent_events"] = events
 
                 # Execute the Brain (LangGraph)
                 logger.info("Workflow: Handing off to LangGraph...")
@@ -158,7 +186,7 @@ async def run_document_workflow(file_path: str, user_request: str):
                     name="graph_execution",
                     input={"initial_state_keys": list(initial_state.keys())}
                 ) as graph_span:
-                    final_state = await app_graph.ainvoke(initial_state, config=config)
+                    final_state = await _invoke_graph(initial_state, config)
                     graph_span.update(output={"final_state_keys": list(final_state.keys())})
 
                 # Set trace-level output explicitly
@@ -194,4 +222,41 @@ async def run_document_workflow(file_path: str, user_request: str):
                 trace.score(name="workflow_success", value=0.0, comment=f"Error: {str(e)}", data_type="NUMERIC")
                 # Set trace output on error
                 trace.update_trace(output={"error": str(e), "status": "failed"})
-                return {"error": str(e)}
\ No newline at end of file
+                return {"error": str(e)}
+
+
+def _agent_event(agent_output: Dict[str, Any]) -> Dict[str, Any]:
+    """Client-facing view of one finished agent (its score is still pending)."""
+    metadata = agent_output.get("metadata") or {}
+    return {
+        "event": "agent",
+        "agent": agent_output.get("agent_name"),
+        "status": metadata.get("status"),
+        "output": agent_output.get("output"),
+        "duration_ms": metadata.get("duration_ms"),
+        "error": metadata.get("error"),
+    }
+
+
+async def stream_document_workflow(file_bytes: bytes, filename: str, user_request: str) -> AsyncIterator[Dict[str, Any]]:
+    """
+    run_document_workflow as a stream of events: one {"event": "agent", ...}
+    per agent as it finishes, then {"event": "result", ...} with the full
+    (cleaned) final state. The workflow is cancelled if the consumer stops.
+    """
+    events: asyncio.Queue = asyncio.Queue()
+    run = asyncio.create_task(run_document_workflow(file_bytes, filename, user_request, events=events))
+    try:
+        while True:
+            next_event = asyncio.ensure_future(events.get())
+            done, _ = await asyncio.wait({run, next_event}, return_when=asyncio.FIRST_COMPLETED)
+            if next_event not in done:
+                next_event.cancel()
+                break
+            yield _agent_event(next_event.result())
+
+        while not events.empty():
+            yield _agent_event(events.get_nowait())
+        yield {"event": "result", **run.result()}
+    finally:
+        run.cancel()
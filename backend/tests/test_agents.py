@@ -4,7 +4,22 @@ from app.agents.recommender import RecommenderAgent
 from app.agents.ideation import IdeationAgent
 from app.agents.copywriter import CopywriterAgent
 from app.agents.compliance import ComplianceAgent
+from app.agents.judge import JudgeAgent
+from app.agents.router import RouterAgent
+from app.agents.refiner import RefinerAgent
+from app.agents.summarizer import SummarizerAgent
+from app.agents.translator import TranslatorAgent
 from app.core.config import settings
+from app.core import llm_batcher, llm_cache
+
+
+class FakeLLM:
+    """Stand-in for a ResidentOllama: the cache keys on model and temperature."""
+    model = "fake"
+    temperature = 0.0
+
+    def __init__(self):
+        self.prompts = []
 
 
 def test_agents_can_instantiate():
@@ -24,6 +39,15 @@ def test_agents_can_instantiate():
     assert hasattr(comp, "run")
 
 
+def test_agents_share_prompts_and_clients():
+    """Agents are built per node call, so prompts and LLM clients must be reused."""
+    for agent in (ExtractorAgent, AnalyzerAgent, RecommenderAgent, IdeationAgent, CopywriterAgent,
+                  JudgeAgent, RefinerAgent, RouterAgent, SummarizerAgent, TranslatorAgent):
+        first, second = agent(), agent()
+        assert first.prompt is second.prompt, agent.__name__
+        assert first.llm is second.llm, agent.__name__
+
+
 def test_compliance_agent_blocks_spam():
     ca = ComplianceAgent()
     res = ca.run("This campaign will spam users and sell personal data")
@@ -40,3 +64,310 @@ def test_config_defaults():
     assert settings.APP_NAME == "ContentLens_AI"
     assert isinstance(settings.MAX_FILE_SIZE_MB, int)
     assert settings.MAX_FILE_SIZE_MB >= 1
+
+
+def test_agent_models_default_to_primary():
+    from app.core.config import Settings
+
+    configured = Settings(OLLAMA_MODEL_PRIMARY="primary", OLLAMA_MODEL_JUDGE="judge")
+    assert configured.OLLAMA_MODEL_ROUTER == "primary"
+    assert configured.OLLAMA_MODEL_TRANSLATOR == "primary"
+    assert configured.OLLAMA_MODEL_JUDGE == "judge"
+
+
+def test_llm_cache_reuses_identical_prompts():
+    class EchoLLM(FakeLLM):
+        calls = 0
+
+        def invoke(self, prompt):
+            self.calls += 1
+            return f"echo:{prompt}"
+
+    llm_cache.clear()
+    llm = EchoLLM()
+    assert llm_cache.cached_invoke(llm, "same prompt") == "echo:same prompt"
+    assert llm_cache.cached_invoke(llm, "same prompt") == "echo:same prompt"
+    assert llm_cache.cached_invoke(llm, "other prompt") == "echo:other prompt"
+    assert llm.calls == 2
+
+
+def test_judge_stops_streaming_after_score():
+    class FakeStreamLLM(FakeLLM):
+        consumed = 0
+
+        async def astream_text(self, prompt):
+            for chunk in ["SCORE: 8", "\nREASONING: clear", " and complete", "\n", "trailing", " text"]:
+                self.consumed += 1
+                yield chunk
+
+    llm_cache.clear()
+    judge = JudgeAgent()
+    judge.llm = FakeStreamLLM()
+    result = judge.evaluate("analysis", "brief", "output")
+    assert result["score"] == 8
+    assert result["reasoning"] == "clear and complete"
+    assert judge.llm.consumed == 4
+
+
+def test_judge_keeps_score_without_reasoning():
+    class ScoreOnlyLLM(FakeLLM):
+
+        async def astream_text(self, prompt):
+            yield "SCORE: 9\n"
+
+    llm_cache.clear()
+    judge = JudgeAgent()
+    judge.llm = ScoreOnlyLLM()
+    result = judge.evaluate("analysis", "brief", "score only")
+    assert result["score"] == 9
+    assert result["reasoning"] == "Evaluation failed to parse"
+
+
+def test_judge_batch_parses_numbered_scores():
+    class FakeBatchLLM(FakeLLM):
+        calls = 0
+
+        async def ainvoke(self, prompt):
+            self.calls += 1
+            return "SCORE_1: 7\nREASONING_1: solid\nSCORE_2: 12\nREASONING_2: excellent"
+
+    llm_cache.clear()
+    judge = JudgeAgent()
+    judge.llm = FakeBatchLLM()
+    results = judge.evaluate_batch([
+        {"agent_type": "analysis", "input_context": "brief", "output": "a"},
+        {"agent_type": "ideation", "input_context": "brief", "output": "b"},
+    ])
+    assert judge.llm.calls == 1
+    assert [r["score"] for r in results] == [7, 10]
+    assert [r["agent_type"] for r in results] == ["analysis", "ideation"]
+    assert results[0]["reasoning"] == "solid"
+
+
+def test_judge_batch_reuses_earlier_judgements():
+    class FakeBatchLLM(FakeLLM):
+
+        async def ainvoke(self, prompt):
+            self.prompts.append(prompt)
+            return "SCORE_1: 6\nREASONING_1: fine\nSCORE_2: 9\nREASONING_2: sharp"
+
+        async def astream_text(self, prompt):
+            self.prompts.append(prompt)
+            yield "SCORE: 7\nREASONING: ok\n"
+
+    llm_cache.clear()
+    judge = JudgeAgent()
+    judge.llm = FakeBatchLLM()
+    extraction = {"agent_type": "extraction", "input_context": "same document", "output": "{}"}
+    first = judge.evaluate_batch([extraction, {"agent_type": "summary", "input_context": "x", "output": "s"}])
+    # Same document, different request: only the new output is judged
+    second = judge.evaluate_batch([extraction, {"agent_type": "analysis", "input_context": "x", "output": "a"}])
+    assert second[0] == first[0]
+    assert second[1]["score"] == 7
+    assert len(judge.llm.prompts) == 2 and "same document" not in judge.llm.prompts[1]
+
+
+def test_llm_batcher_coalesces_concurrent_prompts():
+    import asyncio
+
+    class PackingLLM(FakeLLM):
+
+        async def ainvoke(self, prompt):
+            self.prompts.append(prompt)
+            if "### PROMPT" not in prompt:
+                return f"single:{prompt}"
+            # Answer only the first two prompts of the batch
+            return "### ANSWER 1\nfirst\n### ANSWER 2\nsecond"
+
+    async def main():
+        llm = PackingLLM()
+        answers = await asyncio.gather(*(llm_batcher.batched_ainvoke(llm, p) for p in ["a", "b", "c"]))
+        return llm, answers
+
+    llm, answers = asyncio.run(main())
+    assert answers == ["first", "second", "single:c"]
+    assert len(llm.prompts) == 2
+
+
+def test_llm_batcher_sends_json_mode_prompts_alone():
+    import asyncio
+
+    class FakeJsonLLM(FakeLLM):
+        format = "json"
+
+        async def ainvoke(self, prompt):
+            self.prompts.append(prompt)
+            return "{}"
+
+    llm = FakeJsonLLM()
+
+    async def main():
+        return await asyncio.gather(*(llm_batcher.batched_ainvoke(llm, p) for p in ["a", "b"]))
+
+    assert asyncio.run(main()) == ["{}", "{}"]
+    assert llm.prompts == ["a", "b"]
+
+
+def test_llm_batcher_bins_prompts_by_expected_length():
+    import asyncio
+
+    class SingleLLM(FakeLLM):
+
+        async def ainvoke(self, prompt):
+            self.prompts.append(prompt)
+            return f"single:{prompt}"
+
+    llm = SingleLLM()
+    long_prompt = "x" * 4000
+
+    async def main():
+        return await asyncio.gather(*(llm_batcher.batched_ainvoke(llm, p) for p in ["short", long_prompt]))
+
+    # Different bins, so neither waits for (or is packed with) the other
+    assert asyncio.run(main()) == ["single:short", f"single:{long_prompt}"]
+    assert llm.prompts == ["short", long_prompt]
+
+
+def test_llm_cache_entries_expire(monkeypatch):
+    llm_cache.clear()
+    monkeypatch.setattr(settings, "LLM_CACHE_TTL_SECONDS", 0)
+    llm_cache.put("key", "value")
+    assert llm_cache.get("key") is None
+
+    monkeypatch.setattr(settings, "LLM_CACHE_TTL_SECONDS", 3600)
+    llm_cache.put("key", "value")
+    assert llm_cache.get("key") == "value"
+
+
+def test_ollama_ainvoke_uses_shared_http_client(monkeypatch):
+    import asyncio
+    import json
+    import httpx
+    from app.core import llm_pool
+
+    requests = []
+
+    def handler(request):
+        requests.append(json.loads(request.content))
+        return httpx.Response(200, json={"response": "async answer", "done": True})
+
+    client = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+    monkeypatch.setattr(llm_pool, "get_ollama_client", lambda: client)
+    llm = llm_pool.get_ollama("fake-model", 0.1, num_keep=12)
+
+    assert asyncio.run(llm.ainvoke("hello")) == "async answer"
+    assert requests[0]["model"] == "fake-model"
+    assert requests[0]["prompt"] == "hello"
+    assert requests[0]["stream"] is False
+    assert requests[0]["options"]["num_keep"] == 12
+    assert requests[0]["keep_alive"] == settings.OLLAMA_KEEP_ALIVE
+
+
+def test_router_keywords_skip_the_llm():
+    class FailingLLM(FakeLLM):
+
+        async def ainvoke(self, prompt):
+            raise AssertionError("keyword requests must not reach the LLM")
+
+    router = RouterAgent()
+    router.llm = FailingLLM()
+    assert router.decide("Translate to Arabic and analyze the brief") == ["translate", "analyze"]
+    assert router.decide("Give me a TL;DR summary") == ["summarize"]
+    # Tasks follow the order they are asked for
+    assert router.decide("Translate it, then summarize") == ["translate", "summarize"]
+    # Keywords match at word starts only ("read" is not an "ad")
+    assert router.decide("Please read it") == ["analyze"]
+    # ...and end on word boundaries unless they are stems
+    assert router.decide("Translate the address block") == ["translate"]
+    assert router.decide("Summarize the document and add a headline") == ["summarize", "ideate", "copywrite"]
+    assert router.decide("Give a shortlist of advanced ideas") == ["recommend", "ideate"]
+    # Nouns every brief mentions do not select agents on their own
+    assert router.decide("Summarize this campaign brief") == ["summarize"]
+    assert router.decide("Check this campaign for GDPR compliance") == ["compliance"]
+    assert router.decide("Make a copy of the summary in Arabic") == ["summarize", "translate"]
+    assert router.decide("Write the subject line and ad copy") == ["copywrite"]
+    assert router.decide("Summarization and analytics, please") == ["summarize", "analyze"]
+
+
+def test_router_regex_fallback_matches_whole_words(monkeypatch):
+    router = RouterAgent()
+    monkeypatch.setattr(RouterAgent, "_AUTOMATON", None)
+    assert router.guess("Translate the address block") == ["translate"]
+    assert router.guess("Summarize the document and add a headline") == ["summarize", "ideate", "copywrite"]
+    assert router.guess("Give a shortlist of advanced ideas") == ["recommend", "ideate"]
+    assert router.guess("ترجمة الملخص") == ["translate"]
+
+
+def test_compact_serializes_payloads_as_minimal_json():
+    from app.core.serialize import compact
+
+    assert compact({"Brand": "Café", "Budget": None, "Channels": ["tv", "x"]}) == '{"Brand":"Café","Budget":null,"Channels":["tv","x"]}'
+    assert compact("already text") == "already text"
+
+
+def test_short_output_agents_bound_generation():
+    router_options = RouterAgent().llm._default_params["options"]
+    assert router_options["num_predict"] == settings.NUM_PREDICT_ROUTER
+    assert router_options["stop"] == ["\n\n"]
+    assert SummarizerAgent().llm._default_params["options"]["num_predict"] == settings.NUM_PREDICT_SUMMARIZER
+
+    # The one-line answer the stop sequence leaves still parses
+    class OneLineLLM(FakeLLM):
+        model = "fake-router"
+
+        async def ainvoke(self, prompt):
+            return "summarize, translate"
+
+    router = RouterAgent()
+    router.llm = OneLineLLM()
+    request = " ".join(["please"] * (settings.ROUTER_LLM_MIN_WORDS + 1))
+    assert router.decide(request) == ["summarize", "translate"]
+
+
+def test_tracing_is_skipped_without_langfuse_keys():
+    from app.core import langfuse
+
+    assert langfuse.get_langfuse_callback() is None
+    assert langfuse.get_langfuse_client() is None
+
+    def run(self, text):
+        return text.upper()
+
+    # Unconfigured tracing leaves the method unwrapped
+    assert langfuse.trace_agent_execution("test", "model")(run) is run
+
+
+def test_translator_skips_arabic_content(monkeypatch):
+    def no_llm(*args, **kwargs):
+        raise AssertionError("LLM used for Arabic content")
+
+    monkeypatch.setattr(TranslatorAgent, "render", no_llm)
+    result = TranslatorAgent().run("تقرير الحملة الإعلانية: ارتفعت نسبة النقر CTR بنسبة 12%")
+    assert result.startswith("Note: Content is already in Arabic.")
+
+
+def test_count_tokens_for_local_models():
+    from app.core.langfuse import count_tokens
+
+    assert count_tokens("", settings.OLLAMA_MODEL_PRIMARY) == 0
+    # Ollama models are unknown to tiktoken and fall back to the word estimate
+    assert count_tokens("one two three", settings.OLLAMA_MODEL_PRIMARY) == 4
+
+
+def test_langfuse_callback_is_built_once(monkeypatch):
+    from app.core import langfuse
+
+    monkeypatch.setattr(settings, "LANGFUSE_PUBLIC_KEY", "pk-test")
+    monkeypatch.setattr(settings, "LANGFUSE_SECRET_KEY", "sk-test")
+    monkeypatch.setattr(langfuse, "_handler", None)
+    monkeypatch.setattr(langfuse, "_handler_ready", False)
+    assert langfuse.get_langfuse_callback() is not None
+    assert langfuse.get_langfuse_callback() is langfuse.get_langfuse_callback()
+
+
+def test_trace_sampling_is_consistent_per_trace():
+    from app.core.langfuse import in_sample
+
+    assert all(in_sample(f"trace-{i}", 1.0) for i in range(100))
+    assert [in_sample(f"trace-{i}", 0.3) for i in range(100)] == [in_sample(f"trace-{i}", 0.3) for i in range(100)]
+    assert 10 < sum(in_sample(f"trace-{i}", 0.3) for i in range(100)) < 50
@@ -12,8 +12,14 @@ def test_root():
     assert res.json().get("message") == "ContentLens AI backend is running"
 
 
+def test_healthz():
+    res = client.get("/healthz")
+    assert res.status_code == 200
+    assert res.json() == {"status": "ok"}
+
+
 def test_process_document_success(monkeypatch, tmp_path):
-    async def fake_run(file_path, user_request):
+    async def fake_run(file_bytes, filename, user_request):
         return {"summary": "ok", "extraction": {"title": "t"}}
 
     monkeypatch.setattr(routes, "run_document_workflow", fake_run)
@@ -28,7 +34,7 @@ def test_process_document_success(monkeypatch, tmp_path):
 
 
 def test_process_document_failure(monkeypatch):
-    async def fake_run(file_path, user_request):
+    async def fake_run(file_bytes, filename, user_request):
         return {"error": "failed to extract"}
 
     monkeypatch.setattr(routes, "run_document_workflow", fake_run)
@@ -39,7 +45,7 @@ def test_process_document_failure(monkeypatch):
 
 
 def test_process_document_exception(monkeypatch):
-    async def fake_run(file_path, user_request):
+    async def fake_run(file_bytes, filename, user_request):
         raise Exception("boom")
 
     monkeypatch.setattr(routes, "run_document_workflow", fake_run)
@@ -47,3 +53,35 @@ def test_process_document_exception(monkeypatch):
     files = {"file": ("test.txt", b"Hello", "text/plain")}
     res = client.post("/api/process-document", files=files)
     assert res.status_code == 500
+
+
+def test_process_document_rejects_oversized_upload(monkeypatch):
+    async def fake_run(file_bytes, filename, user_request):
+        raise AssertionError("oversized uploads must not reach the workflow")
+
+    monkeypatch.setattr(routes, "run_document_workflow", fake_run)
+    monkeypatch.setattr(routes.settings, "MAX_FILE_SIZE_MB", 0)
+
+    files = {"file": ("test.txt", b"Hello", "text/plain")}
+    res = client.post("/api/process-document", files=files)
+    assert res.status_code == 413
+
+
+def test_process_document_streams_agent_events(monkeypatch):
+    import app.workflows.process_document as workflow
+
+    async def fake_run(file_bytes, filename, user_request, events=None):
+        events.put_nowait({"agent_name": "summarize", "output": "short", "metadata": {"status": "completed"}})
+        return {"summary": "short", "extraction": {"title": "t"}, "agent_events": None}
+
+    monkeypatch.setattr(workflow, "run_document_workflow", fake_run)
+    monkeypatch.setattr(routes, "stream_document_workflow", workflow.stream_document_workflow)
+
+    files = {"file": ("test.txt", b"Hello", "text/plain")}
+    res = client.post("/api/process-document?stream=1", files=files, data={"user_request": "Summarize"})
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/event-stream")
+    events = [block.split("\n") for block in res.text.strip().split("\n\n")]
+    assert [lines[0] for lines in events] == ["event: agent", "event: result"]
+    assert '"agent":"summarize"' in events[0][1]
+    assert '"summary":"short"' in events[1][1] and "agent_events" not in events[1][1]
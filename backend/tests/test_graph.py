@@ -1,16 +1,28 @@
-from app.graphs.document_graph import routing_logic, create_graph
+import asyncio
+import pytest
+
+from app.graphs.document_graph import create_graph
+from app.nodes.router_node import router_node
 from app.agents.router import RouterAgent
+from app.models.state.state import merge_evaluations
+
+
+def test_graph_fans_out_after_routing():
+    # Selected agents run inside one parallel node, not one graph step each
+    nodes = set(create_graph().nodes)
+    assert {"node_extract", "node_refine", "node_router", "node_parallel_agents"} <= nodes
+    assert not any(node.startswith("to_") for node in nodes)
 
 
-def test_routing_logic():
-    # Use the state shape expected by routing_logic
-    assert routing_logic({"next_steps": ["summarize"], "current_step_index": 0}) == "to_summarize"
-    assert routing_logic({"next_steps": ["translate"], "current_step_index": 0}) == "to_translate"
-    assert routing_logic({"next_steps": ["analyze"], "current_step_index": 0}) == "to_analyze"
-    assert routing_logic({"next_steps": ["recommend"], "current_step_index": 0}) == "to_recommend"
-    # Unknown/empty moves to END
-    assert routing_logic({"next_steps": ["unknown"], "current_step_index": 0}) == "end"
-    assert routing_logic({}) == "end"
+def test_merge_evaluations_replaces_pending_items():
+    pending = {"agent_type": "extraction", "pending": True}
+    merged = merge_evaluations([pending], [{"agent_type": "summary", "score": 7}])
+    merged = merge_evaluations(merged, [{"agent_type": "extraction", "score": 9}])
+    assert merged == [{"agent_type": "extraction", "score": 9}, {"agent_type": "summary", "score": 7}]
+
+
+def test_router_node_keeps_preset_steps():
+    assert asyncio.run(router_node({"next_steps": ["summarize"], "current_step_index": 0})) == {}
 
 
 def test_router_marketing_keywords():
@@ -25,3 +37,160 @@ def test_create_graph_returns_compiled():
     graph = create_graph()
     compiled = graph is not None
     assert compiled
+
+
+def _brief_state(raw_text="Campaign brief for brand B", user_request="Summarize it and translate it"):
+    return {
+        "raw_text": raw_text,
+        "user_request": user_request,
+        "source_lang": "en",
+        "errors": [],
+        "evaluations": [],
+    }
+
+
+def _default_answer(llm, prompt):
+    # The refined request doubles as every non-JSON agent's output
+    return '{"Brand": "B"}' if llm.format == "json" else "Summarize and translate"
+
+
+@pytest.fixture
+def fake_ollama(monkeypatch):
+    """
+    Serve every generation from answer(llm, prompt) (async) and score every
+    judgement 8/10, starting from an empty completion cache so no test sees
+    another's answers. Returns the installer for the answer function.
+    """
+    from langchain_core.outputs import Generation, LLMResult
+    from app.agents.judge import JudgeAgent
+    from app.core import llm_cache
+    from app.core.llm_pool import ResidentOllama
+
+    async def fake_judge(self, prompt):
+        return "SCORE: 8\nREASONING: fine\n"
+
+    def install(answer):
+        async def fake_generate(self, prompts, stop=None, images=None, run_manager=None, **kwargs):
+            return LLMResult(generations=[[Generation(text=await answer(self, prompt))] for prompt in prompts])
+
+        monkeypatch.setattr(ResidentOllama, "_agenerate", fake_generate)
+
+    llm_cache.clear()
+    monkeypatch.setattr(JudgeAgent, "_astream_until_scored", fake_judge)
+    return install
+
+
+def _fused_answer(llm, prompt):
+    if llm.format == "json" and '"summary"' in prompt:
+        return '{"summary": "Launch X for B.", "translation": "إطلاق X لـ B."}'
+    return _default_answer(llm, prompt)
+
+
+def test_graph_runs_selected_agents_concurrently(monkeypatch, fake_ollama):
+    from app.core.llm_pool import ResidentOllama
+
+    async def answer(llm, prompt):
+        return _default_answer(llm, prompt)
+
+    async def fake_stream(self, prompt, stop=None, **kwargs):
+        # The fused JSON above has no summary, so the streamed fallback runs
+        for chunk in ["Summarize ", "and translate"]:
+            yield chunk
+
+    fake_ollama(answer)
+    monkeypatch.setattr(ResidentOllama, "astream_text", fake_stream)
+
+    state = asyncio.run(create_graph().ainvoke(_brief_state()))
+
+    assert state["next_steps"] == ["summarize", "translate"]
+    assert state["summary"] == "Summarize and translate"
+    assert state["translation"] == "Summarize and translate"
+    assert sorted(state["completed_agents"]) == ["summarize", "translate"]
+    assert not state["errors"]
+
+
+def test_summarize_and_translate_share_one_call(fake_ollama):
+    prompts_seen = []
+
+    async def answer(llm, prompt):
+        prompts_seen.append(prompt)
+        if "ARABIC TRANSLATION:" in prompt or "EXECUTIVE SUMMARY:" in prompt:
+            return "separate agent call"
+        return _fused_answer(llm, prompt)
+
+    fake_ollama(answer)
+
+    state = asyncio.run(create_graph().ainvoke(_brief_state()))
+
+    assert state["summary"] == "Launch X for B."
+    assert state["translation"] == "إطلاق X لـ B."
+    assert sorted(state["completed_agents"]) == ["summarize", "translate"]
+    assert not any("separate agent call" in p for p in prompts_seen)
+    assert {"summary", "translation"} <= {e["agent_type"] for e in state["evaluations"]}
+
+
+def test_agent_nodes_skip_empty_input(monkeypatch):
+    from app.core.llm_pool import ResidentOllama
+    from app.nodes.ideation_node import ideation_node
+    from app.nodes.recommendation_node import recommendation_node
+
+    async def no_llm(self, *args, **kwargs):
+        raise AssertionError("LLM called for empty input")
+
+    monkeypatch.setattr(ResidentOllama, "_agenerate", no_llm)
+    empty = {"raw_text": "", "extraction": None, "user_request": "ideas"}
+    assert asyncio.run(ideation_node(empty))["ideation"] is None
+    assert asyncio.run(recommendation_node(empty))["recommendation"] is None
+    # An empty extraction is no input either
+    empty.update(extraction={}, extraction_json="{}")
+    assert asyncio.run(ideation_node(empty))["ideation"] is None
+
+
+def test_speculative_agents_are_adopted_not_rerun(monkeypatch, fake_ollama):
+    from app.core.config import settings
+    fused_calls = []
+
+    async def answer(llm, prompt):
+        if llm.format == "json" and '"summary"' in prompt:
+            fused_calls.append(prompt)
+        return _fused_answer(llm, prompt)
+
+    monkeypatch.setattr(settings, "SPECULATIVE_AGENTS_ENABLED", True)
+    fake_ollama(answer)
+
+    state = asyncio.run(create_graph().ainvoke(_brief_state()))
+
+    assert state["summary"] == "Launch X for B."
+    assert sorted(state["completed_agents"]) == ["summarize", "translate"]
+    assert len(fused_calls) == 1
+
+
+def test_speculative_agents_are_cancelled_when_routing_fails(monkeypatch, fake_ollama):
+    from app.core.config import settings
+    from app.workflows.process_document import _invoke_graph
+    cancelled = []
+
+    async def answer(llm, prompt):
+        if llm.format == "json" and '"summary"' in prompt:
+            try:
+                await asyncio.sleep(3600)
+            except asyncio.CancelledError:
+                cancelled.append(prompt)
+                raise
+        return _default_answer(llm, prompt)
+
+    async def failing_router(self, user_request):
+        raise RuntimeError("router down")
+
+    async def run():
+        with pytest.raises(RuntimeError):
+            await _invoke_graph(_brief_state(), {})
+        await asyncio.sleep(0)
+        # Checked before asyncio.run() would cancel leftovers on its own
+        assert len(cancelled) == 1
+
+    monkeypatch.setattr(settings, "SPECULATIVE_AGENTS_ENABLED", True)
+    monkeypatch.setattr(RouterAgent, "adecide", failing_router)
+    fake_ollama(answer)
+
+    asyncio.run(run())
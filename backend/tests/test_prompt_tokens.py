@@ -0,0 +1,20 @@
+import re
+
+import pytest
+
+from app.agents.recommender import RecommenderAgent
+from app.agents.router import RouterAgent
+from app.agents.summarizer import SummarizerAgent
+
+# Every prompt token is paid for in prompt_eval on each call
+MAX_TEMPLATE_TOKENS = 200
+
+
+def count_tokens(text: str) -> int:
+    # Count words and punctuation marks (close to BPE for English, and works offline)
+    return len(re.findall(r"\w+|[^\w\s]", text))
+
+
+@pytest.mark.parametrize("agent", [RouterAgent, RecommenderAgent, SummarizerAgent])
+def test_template_stays_compact(agent):
+    assert count_tokens(agent.template) < MAX_TEMPLATE_TOKENS